@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compares loading one list page from a JSON dump of the catalog, from the SQLite catalog and from the mmap
+# snapshot. Every run opens its store again, like a plugin invocation does.
+#
+#   python benchmarks/bench_catalog_snapshot.py [--teasers 1000] [--page 3] [--pageSize 20] [--runs 50]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from libs.catalog import Catalog  # noqa: E402
+from libs.catalog_snapshot import openSnapshot  # noqa: E402
+from libs.records import Pagination, Teaser  # noqa: E402
+
+
+def buildTeasers(count):
+    return [Teaser('2030-01-01T00:00:00Z',
+                   f'20{10 + i % 12:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}T20:15:{i % 60:02d}Z',
+                   3600 + i,
+                   f'https://img.ardmediathek.de/standard/00/{i:08d}/16x9/?mandant=ard&w={{width}}',
+                   f'Band {i} - Live at Rockpalast {1970 + i % 50}',
+                   f'https://api.ardmediathek.de/page-gateway/pages/wdr/item/{i}',
+                   'A full concert recording from the Rockpalast archive. ' * 6) for i in range(count)]
+
+
+def runJson(path, pageNumber, pageSize):
+    with open(path, 'rb') as file:
+        teasers = [Teaser._make(teaser) for teaser in json.loads(file.read())]
+    page = [teaser._replace(poster=teaser.poster.replace('{width}', '480'))
+            for teaser in teasers[pageNumber * pageSize:(pageNumber + 1) * pageSize]]
+    return Pagination(pageNumber, pageSize, len(teasers)), page
+
+
+def runCatalog(path, pageNumber, pageSize):
+    catalog = Catalog(path, 'bench')
+    try:
+        return catalog.getPage(pageNumber, pageSize, 480)
+    finally:
+        catalog.close()
+
+
+def runSnapshot(path, pageNumber, pageSize):
+    snapshot = openSnapshot(path)
+    try:
+        return snapshot.getPage(pageNumber, pageSize, 480)
+    finally:
+        snapshot.close()
+
+
+def measure(name, run, path, args):
+    times = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        pagination, teasers = run(path, args.page, args.pageSize)
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    print(f'{name:9} file={os.path.getsize(path) / 1024:8.1f} KiB  teasers={len(teasers):3d}/'
+          f'{pagination.totalElements:5d}  median={times[len(times) // 2] * 1000:7.2f} ms  '
+          f'min={times[0] * 1000:7.2f} ms')
+    return teasers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teasers', type=int, default=1000)
+    parser.add_argument('--page', type=int, default=3)
+    parser.add_argument('--pageSize', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    teasers = buildTeasers(args.teasers)
+    with tempfile.TemporaryDirectory() as directory:
+        catalogPath = os.path.join(directory, 'catalog.db')
+        catalog = Catalog(catalogPath, 'bench')
+        catalog.sync(lambda pageNumber, pageSize: (None, teasers if pageNumber == 0 else []))
+
+        snapshotPath = os.path.join(directory, 'catalog-bench.snapshot')
+        catalog.writeSnapshot(snapshotPath)
+
+        # the JSON path keeps the same ordered teasers as one array, the way a cached response would hold them
+        jsonPath = os.path.join(directory, 'catalog.json')
+        with open(jsonPath, 'w') as file:
+            json.dump(catalog.getAll('{width}'), file, separators=(',', ':'))
+        catalog.close()
+
+        print(f'{args.teasers} teasers, page {args.page} of size {args.pageSize}, {args.runs} runs')
+        results = [measure('json', runJson, jsonPath, args),
+                   measure('sqlite', runCatalog, catalogPath, args),
+                   measure('snapshot', runSnapshot, snapshotPath, args)]
+
+    if not results[0] == results[1] == results[2]:
+        print('the stores returned different pages')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Builds a directory with GuiManager once per entry and once batched, against the counting xbmcplugin
+# stand-in. --latency simulates the cost of each call into Kodi.
+#
+#   python benchmarks/bench_gui_manager.py [--entries 30] [--latency 0.002] [--repeat 20]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks import fake_kodi  # noqa: E402
+
+fake_kodi.install()
+
+import xbmcplugin  # noqa: E402
+
+from libs.kodion.gui_manager import GuiManager  # noqa: E402
+
+
+def build(batch, entries):
+    guiManager = GuiManager('1', 'plugin.video.rockpalast', '', '/tmp/fanart.jpg', batch)
+    for i in range(entries):
+        infoLabels = {
+            'Title': f'Band {i}',
+            'Plot': f'Band {i} live at Rockpalast',
+            'Date': '2022-01-01T20:15:00Z',
+            'Aired': '2022-01-01T20:15:00Z',
+            'Duration': 3600
+        }
+        guiManager.addDirectory(title=f'Band {i}', poster=f'https://img.ardmediathek.de/{i}?w=640', _type='Video',
+                                infoLabels=infoLabels, args={'method': 'item', 'url': f'https://example.org/{i}'})
+    guiManager.endOfDirectory()
+
+
+def measure(batch, args):
+    xbmcplugin.call_latency = args.latency
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        xbmcplugin.reset()
+        build(batch, args.entries)
+    elapsed = (time.perf_counter() - start) / args.repeat
+
+    calls = ', '.join(f'{name}={count}' for name, count in sorted(xbmcplugin.calls.items()))
+    print(f'{"batched" if batch else "per entry":10} {elapsed * 1000:8.2f} ms/directory  '
+          f'items={len(xbmcplugin.items)}  calls: {calls}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated seconds per xbmcplugin call')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    measure(False, args)
+    measure(True, args)
+
+
+if __name__ == '__main__':
+    main()
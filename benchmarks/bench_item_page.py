@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Cost of building the entries of a list page in addItemPage: the translated labels, the timestamp parsing and
+# formatting and the plot text. The 'strptime' and 'per call' lines show what the old code paths cost for the
+# same work; GuiManager runs in batch mode against the xbmcplugin stand-in.
+#
+#   python benchmarks/bench_item_page.py [--entries 30] [--repeat 200]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks import fake_kodi  # noqa: E402
+
+fake_kodi.install()
+
+import xbmcaddon  # noqa: E402
+import xbmcplugin  # noqa: E402
+
+from libs.records import Teaser  # noqa: E402
+from libs.utils import utils  # noqa: E402
+from libs import translations  # noqa: E402
+
+
+def getTeasers(entries):
+    # a page has a handful of distinct expiry dates, broadcast dates are unique
+    return [Teaser(f'2027-12-{1 + i % 4:02d}T22:59:00Z',
+                   f'20{10 + i % 12:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}T20:15:00Z', 600 + i * 97, f'https://img.ardmediathek.de/{i}?w=640', f'Band {i} - Live at Rockpalast',
+                   f'https://api.ardmediathek.de/page-gateway/pages/wdr/item/{i}', None) for i in range(entries)]
+
+
+def measure(name, function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    print(f'{name:28} {(time.perf_counter() - start) / repeat * 1000:8.3f} ms/page')
+
+
+def parseStrptime(teasers):
+    for teaser in teasers:
+        for value in (teaser.broadcastedOn, teaser.availableTo):
+            datetime(*(time.strptime(value, '%Y-%m-%dT%H:%M:%SZ')[0:6])).strftime('%d.%m.%Y, %H:%M:%S')
+
+
+def parseFast(teasers):
+    for teaser in teasers:
+        for value in (teaser.broadcastedOn, teaser.availableTo):
+            utils.formatTimestamp(value, '%d.%m.%Y, %H:%M:%S')
+
+
+def lookupPerCall(addon, teasers):
+    # what Translations.getString did before: the whole table for every string
+    def getString(name):
+        return {key: addon.getLocalizedString(stringId) for key, stringId in translations._IDS.items()}[name]
+
+    for _ in teasers:
+        for name in (translations.HOURS, translations.DURATION, translations.BROADCASTEDON, translations.AVAILABLETO):
+            getString(name)
+
+
+def lookupTable(t, teasers):
+    for _ in teasers:
+        for name in (translations.HOURS, translations.DURATION, translations.BROADCASTEDON, translations.AVAILABLETO):
+            t.getString(name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    teasers = getTeasers(args.entries)
+    addon = xbmcaddon.Addon('plugin.video.rockpalast')
+
+    with tempfile.TemporaryDirectory() as profile:
+        measure('timestamps, strptime', lambda: parseStrptime(teasers), args.repeat)
+        measure('timestamps, memoized', lambda: parseFast(teasers), args.repeat)
+        measure('strings, per call', lambda: lookupPerCall(addon, teasers), args.repeat)
+        measure('strings, table', lambda: lookupTable(translations.Translations(addon, profile), teasers), args.repeat)
+
+        translations._tables.clear()
+        start = time.perf_counter()
+        translations.Translations(addon, profile)
+        print(f'{"table from the profile":28} {(time.perf_counter() - start) * 1000:8.3f} ms')
+
+        from libs.ardmediathek_client import ArdMediathekClient
+
+        xbmcaddon.profile = profile
+        sys.argv = ['plugin://plugin.video.rockpalast/', '1', '']
+        client = ArdMediathekClient('plugin.video.rockpalast', 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0', 'wdr',
+                                    'Rockpalast', '139ec54a14d5792b')
+
+        def build():
+            xbmcplugin.reset()
+            for teaser in teasers:
+                client.addItemPage(teaser)
+            client._guiManager.flush()
+
+        measure('addItemPage', build, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
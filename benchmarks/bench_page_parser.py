@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compares the json.loads path with the streaming PageParser on a synthetic page-gateway list page.
+#
+#   python benchmarks/bench_page_parser.py [--teasers 500] [--chunk 16384] [--bandwidth 2000000]
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from libs.page_parser import PageParser, getPagination, getTeaser  # noqa: E402
+
+
+def buildPage(count):
+    teasers = []
+    for i in range(count):
+        teasers.append({
+            'availableTo': '2030-01-01T00:00:00Z',
+            'broadcastedOn': f'2022-{i % 12 + 1:02d}-{i % 28 + 1:02d}T20:15:00Z',
+            'duration': 3600 + i,
+            'id': f'Y3JpZDovL3dkci5kZS9CZWl0cmFnLTE{i:08d}',
+            'images': {
+                'aspect16x9': {'alt': f'Band {i}', 'producerName': 'WDR', 'src': f'https://img.ardmediathek.de/'
+                               f'standard/00/{i:08d}/16x9/?mandant=ard&w={{width}}', 'title': f'Band {i}'},
+                'aspect1x1': {'alt': f'Band {i}', 'producerName': 'WDR', 'src': f'https://img.ardmediathek.de/'
+                              f'standard/00/{i:08d}/1x1/?mandant=ard&w={{width}}', 'title': f'Band {i}'}
+            },
+            'links': {
+                'self': {'href': f'https://api.ardmediathek.de/page-gateway/teasers/wdr/items/{i}', 'id': str(i)},
+                'target': {'href': f'https://api.ardmediathek.de/page-gateway/pages/wdr/item/{i}', 'id': str(i)}
+            },
+            'longTitle': f'Band {i} - Live at Rockpalast {1970 + i % 50}',
+            'mediumTitle': f'Band {i} - Live',
+            'publicationService': {'name': 'WDR', 'partner': 'wdr', 'logo': {'src': 'https://img.ardmediathek.de/wdr'}},
+            'shortTitle': f'Band {i}',
+            'show': {'id': 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0', 'title': 'Rockpalast', 'coreId': 'rockpalast'},
+            'synopsis': 'A full concert recording from the Rockpalast archive. ' * 6,
+            'tracking': {'aggregationLevelId': 38, 'atiCustomVars': {'clipTitle': f'Band {i}', 'mediaType': 'video'}},
+            'type': 'ondemand'
+        })
+
+    return json.dumps({
+        'aZContent': False,
+        'compilationType': 'itemsOfShow',
+        'id': 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0',
+        'pagination': {'pageNumber': 0, 'pageSize': count, 'totalElements': count * 4},
+        'teasers': teasers,
+        'title': 'Rockpalast',
+        'type': 'gridlist'
+    }).encode('utf-8')
+
+
+def chunked(data, size, bandwidth):
+    delay = size / bandwidth if bandwidth > 0 else 0
+    for pos in range(0, len(data), size):
+        if delay > 0:
+            time.sleep(delay)
+        yield data[pos:pos + size]
+
+
+def runJson(chunks):
+    start = time.perf_counter()
+    content = json.loads(b''.join(chunks))
+    getPagination(content['pagination'])
+    first = None
+    teasers = []
+    for teaser in content['teasers']:
+        teasers.append(getTeaser(teaser, 480))
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start, len(teasers)
+
+
+def runStreaming(chunks):
+    start = time.perf_counter()
+    parser = PageParser(chunks, 480)
+    first = None
+    teasers = []
+    for teaser in parser.iterTeasers():
+        teasers.append(teaser)
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start, len(teasers)
+
+
+def measure(name, run, data, args):
+    first, total, count = run(chunked(data, args.chunk, args.bandwidth))
+
+    tracemalloc.start()
+    run(chunked(data, args.chunk, 0))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f'{name:10} teasers={count:5d}  first={first * 1000:8.1f} ms  total={total * 1000:8.1f} ms  '
+          f'peak={peak / 1024:9.1f} KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teasers', type=int, default=500)
+    parser.add_argument('--chunk', type=int, default=16 * 1024)
+    parser.add_argument('--bandwidth', type=int, default=2 * 1000 * 1000, help='simulated bytes per second')
+    args = parser.parse_args()
+
+    data = buildPage(args.teasers)
+    print(f'page size {len(data) / 1024:.1f} KiB, {args.chunk} byte chunks, {args.bandwidth} B/s')
+    measure('json', runJson, data, args)
+    measure('streaming', runStreaming, data, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Cold start per route: every run is a fresh interpreter, like a click in Kodi. Reports the import time of
+# the client, the ArdMediathekClient construction and the route itself against the FixtureServer.
+#
+#   python benchmarks/bench_startup.py [--runs 5]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, _ROOT)
+
+from benchmarks.driver import ROUTES, getFirstItemUrl  # noqa: E402
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+
+
+def child(route, host):
+    from benchmarks import fake_kodi
+    fake_kodi.install()
+
+    start = time.perf_counter()
+    from libs.ardmediathek_client import ArdMediathekClient
+    imported = time.perf_counter()
+
+    sys.argv = ['plugin://plugin.video.rockpalast/', '1', '']
+    app = ArdMediathekClient('plugin.video.rockpalast', 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0', 'wdr', 'Rockpalast',
+                             '139ec54a14d5792b')
+    initialized = time.perf_counter()
+
+    app._BASEURL = app._BASEURL.replace('https://api.ardmediathek.de', host)
+    app._SEARCHURL = app._SEARCHURL.replace('https://page.ardmediathek.de', host)
+    tag = json.dumps({'pageNumber': 0, 'pageSize': 30, 'posterWidth': 640, 'filter': 'Band'})
+    sys.argv[2] = {
+        'home': '',
+        'list': '?' + urllib.parse.urlencode({'method': 'list', 'url': app._BASEURL, 'tag': tag}),
+        'search': '?' + urllib.parse.urlencode({'method': 'search', 'url': app._BASEURL, 'tag': tag}),
+        'all': '?' + urllib.parse.urlencode({'method': 'all', 'url': app._BASEURL}),
+        'item': '?' + urllib.parse.urlencode({'method': 'item', 'url': getFirstItemUrl(host)})
+    }[route]
+
+    app.DoSome()
+    done = time.perf_counter()
+
+    print(json.dumps({
+        'import': imported - start,
+        'init': initialized - imported,
+        'route': done - initialized,
+        'requests': 'requests' in sys.modules,
+        'sqlite3': 'sqlite3' in sys.modules,
+        'modules': len(sys.modules)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', nargs=2, metavar=('ROUTE', 'HOST'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(*args.child)
+        return
+
+    server = FixtureServer().start()
+    host = server.host
+
+    print(f'{"route":8} {"import":>9} {"init":>9} {"route":>9}  modules  requests  sqlite3')
+    for route in ROUTES:
+        results = []
+        for _ in range(args.runs):
+            # a fresh profile per run, every run is a cold start
+            with tempfile.TemporaryDirectory() as profile:
+                env = dict(os.environ, FAKE_KODI_PROFILE=profile)
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', route, host],
+                                        env=env, cwd=_ROOT, capture_output=True, text=True, check=True).stdout
+                results.append(json.loads(output.strip().splitlines()[-1]))
+
+        def median(key):
+            return sorted(result[key] for result in results)[len(results) // 2] * 1000
+
+        last = results[-1]
+        print(f'{route:8} {median("import"):7.1f}ms {median("init"):7.1f}ms {median("route"):7.1f}ms  '
+              f'{last["modules"]:7d}  {str(last["requests"]):8}  {last["sqlite3"]}')
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
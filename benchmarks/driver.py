@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Runs a single plugin invocation of ArdMediathekClient.DoSome against the fake Kodi modules and a
+# FixtureServer, the way Kodi starts main.py for every click. As a script it prints one JSON line:
+#
+#   python -m benchmarks.driver --host http://127.0.0.1:8080 --route list [--page 1] [--setting skip_itemPage=true]
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from benchmarks import fake_kodi  # noqa: E402
+
+ROUTES = ('home', 'list', 'search', 'all', 'item')
+ADDON_ID = 'plugin.video.rockpalast'
+MEDIATHEK_ID = 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0'
+
+
+def getFirstItemUrl(host):
+    from benchmarks.record_fixtures import FIXTURES
+
+    with open(os.path.join(FIXTURES, 'asset.json'), encoding='utf-8') as f:
+        href = json.load(f)['teasers'][0]['links']['target']['href']
+    return href.replace('https://api.ardmediathek.de', host)
+
+
+def invoke(route, host, settings=None, page=0, _filter='Band', url=None):
+    fake_kodi.install()
+    import xbmcaddon
+    import xbmcplugin
+
+    xbmcaddon.settings.clear()
+    xbmcaddon.settings.update(settings or {})
+    xbmcplugin.reset()
+
+    start = time.perf_counter()
+    from libs.ardmediathek_client import ArdMediathekClient
+
+    sys.argv = [f'plugin://{ADDON_ID}/', '1', '']
+    app = ArdMediathekClient(ADDON_ID, MEDIATHEK_ID, 'wdr', 'Rockpalast', '139ec54a14d5792b')
+    app._BASEURL = app._BASEURL.replace('https://api.ardmediathek.de', host)
+    app._SEARCHURL = app._SEARCHURL.replace('https://page.ardmediathek.de', host)
+
+    tag = {'pageNumber': page, 'pageSize': app._PAGESIZE, 'posterWidth': app._POSTERWIDTH}
+    if route == 'home':
+        query = ''
+    elif route == 'list':
+        query = urllib.parse.urlencode({'method': 'list', 'url': app._BASEURL, 'tag': json.dumps(tag)})
+    elif route == 'all':
+        query = urllib.parse.urlencode({'method': 'all', 'url': app._BASEURL})
+    elif route == 'search':
+        tag['filter'] = _filter
+        query = urllib.parse.urlencode({'method': 'search', 'url': app._BASEURL, 'tag': json.dumps(tag)})
+    else:
+        query = urllib.parse.urlencode({'method': 'item', 'url': url or getFirstItemUrl(host)})
+    sys.argv[2] = f'?{query}' if query else ''
+
+    app.DoSome()
+    done = time.perf_counter()
+
+    from libs.tracing import getTracer
+
+    return {
+        'route': route,
+        'time': done - start,
+        'shown': (xbmcplugin.shown or done) - start,
+        'items': len(xbmcplugin.items),
+        'calls': dict(xbmcplugin.calls),
+        'spans': getTracer().getSummary()['spans']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', required=True)
+    parser.add_argument('--route', choices=ROUTES, default='list')
+    parser.add_argument('--page', type=int, default=0)
+    parser.add_argument('--filter', default='Band')
+    parser.add_argument('--url', help='item page of the item route, the first recorded item by default')
+    parser.add_argument('--setting', action='append', default=[], metavar='ID=VALUE')
+    args = parser.parse_args()
+
+    settings = dict(setting.split('=', 1) for setting in args.setting)
+    result = invoke(args.route, args.host, settings, args.page, args.filter, args.url)
+
+    try:
+        import resource
+        result['maxrss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        result['maxrss'] = None
+
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in xbmc* modules for running the addon outside of Kodi. Call install() before importing anything
+# from libs.
+
+import os
+import sys
+
+
+def install():
+    path = os.path.dirname(os.path.abspath(__file__))
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in for Kodi's xbmc module, just enough for the addon to run outside of Kodi.
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+
+ENGLISH_NAME = 2
+ISO_639_1 = 0
+
+log_records = []
+keyboard_text = 'Rockpalast'
+
+
+def log(msg, level=LOGDEBUG):
+    log_records.append((level, msg))
+
+
+def getLanguage(format=ENGLISH_NAME, region=False):
+    return 'en' if format == ISO_639_1 else 'English'
+
+
+class Keyboard:
+
+    def __init__(self, default='', heading='', hidden=False):
+        self._text = default
+
+    def doModal(self, autoclose=0):
+        self._text = keyboard_text
+
+    def isConfirmed(self):
+        return True
+
+    def getText(self):
+        return self._text
+
+
+class Monitor:
+
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        return False
+
+
+class Player:
+
+    def isPlaying(self):
+        return False
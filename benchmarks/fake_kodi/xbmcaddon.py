@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in for Kodi's xbmcaddon module. Settings default to the values in resources/settings.xml and can
+# be overridden through `settings`; localized strings come from the en_gb strings.po.
+
+import os
+import re
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+settings = {}
+profile = os.environ.get('FAKE_KODI_PROFILE', os.path.join(tempfile.gettempdir(), 'fake_kodi', 'profile'))
+
+
+def _loadDefaults():
+    defaults = {}
+    for setting in ElementTree.parse(os.path.join(_ROOT, 'resources', 'settings.xml')).iter('setting'):
+        if setting.get('id') is not None:
+            defaults[setting.get('id')] = setting.get('default', '')
+    return defaults
+
+
+def _loadStrings():
+    path = os.path.join(_ROOT, 'resources', 'language', 'resource.language.en_gb', 'strings.po')
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    return {int(match.group(1)): match.group(2)
+            for match in re.finditer(r'msgctxt "#(\d+)"\s*msgid "(.*)"', content)}
+
+
+def _loadVersion():
+    return ElementTree.parse(os.path.join(_ROOT, 'addon.xml')).getroot().get('version', '')
+
+
+_defaults = _loadDefaults()
+_strings = _loadStrings()
+_version = _loadVersion()
+
+
+class Addon:
+
+    def __init__(self, id=None):
+        self._id = id
+
+    def getSetting(self, id):
+        return settings.get(id, _defaults.get(id, ''))
+
+    def setSetting(self, id, value):
+        settings[id] = value
+
+    def getLocalizedString(self, id):
+        return _strings.get(id, '')
+
+    def getAddonInfo(self, id):
+        return {
+            'id': self._id,
+            'name': self._id,
+            'path': _ROOT,
+            'version': _version,
+            'profile': os.path.join(profile, self._id or 'addon')
+        }.get(id, '')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in for Kodi's xbmcgui module. Notifications are collected in `notifications`.
+
+NOTIFICATION_INFO = 'info'
+NOTIFICATION_WARNING = 'warning'
+NOTIFICATION_ERROR = 'error'
+
+screen_width = 1920
+screen_height = 1080
+notifications = []
+
+
+def getScreenWidth():
+    return screen_width
+
+
+def getScreenHeight():
+    return screen_height
+
+
+class ListItem:
+
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self.label = label
+        self.art = {}
+        self.properties = {}
+        self.info = None
+
+    def setArt(self, values):
+        self.art.update(values)
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def setInfo(self, type, infoLabels):
+        self.info = (type, dict(infoLabels))
+
+    def getLabel(self):
+        return self.label
+
+
+class Dialog:
+
+    def notification(self, heading, message, icon=NOTIFICATION_INFO, time=5000, sound=True):
+        notifications.append((heading, message))
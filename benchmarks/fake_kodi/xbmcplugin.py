@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in for Kodi's xbmcplugin module. Every call is counted, directory items are collected in
+# `items`. `call_latency` simulates the cost of crossing into Kodi for each call, `shown` is the
+# time.perf_counter() at which the listing or the resolved item was handed to Kodi.
+
+import time
+
+SORT_METHOD_NONE = 0
+SORT_METHOD_LABEL = 1
+SORT_METHOD_DATE = 3
+SORT_METHOD_DURATION = 8
+SORT_METHOD_TITLE = 9
+
+calls = {}
+items = []
+sort_methods = []
+call_latency = 0.0
+shown = None
+
+
+def reset():
+    global shown
+    shown = None
+    calls.clear()
+    del items[:]
+    del sort_methods[:]
+
+
+def _call(name):
+    calls[name] = calls.get(name, 0) + 1
+    if call_latency > 0:
+        time.sleep(call_latency)
+
+
+def setPluginFanart(handle, image=None, color1=None, color2=None, color3=None):
+    _call('setPluginFanart')
+
+
+def setContent(handle, content):
+    _call('setContent')
+
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    _call('addDirectoryItem')
+    items.append((url, listitem, isFolder))
+    return True
+
+
+def addDirectoryItems(handle, items_, totalItems=0):
+    _call('addDirectoryItems')
+    items.extend(items_)
+    return True
+
+
+def addSortMethod(handle, sortMethod, labelMask='', label2Mask=''):
+    _call('addSortMethod')
+    sort_methods.append(sortMethod)
+
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    global shown
+    _call('endOfDirectory')
+    shown = time.perf_counter()
+
+
+def setResolvedUrl(handle, succeeded, listitem):
+    global shown
+    _call('setResolvedUrl')
+    shown = time.perf_counter()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Stand-in for Kodi's xbmcvfs module, special:// paths are mapped below the fake profile directory.
+
+import os
+
+import xbmcaddon
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+
+def translatePath(path):
+    if path.startswith('special://home/addons/'):
+        return os.path.normpath(os.path.join(_ROOT, path.split('/', 5)[5]))
+
+    if path.startswith('special://'):
+        return os.path.join(xbmcaddon.profile, path[len('special://'):])
+
+    return path
+
+
+def exists(path):
+    return os.path.exists(path)
+
+
+def mkdirs(path):
+    os.makedirs(path, exist_ok=True)
+    return True
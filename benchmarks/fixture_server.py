@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Local stand-in for the ARD page-gateway, serving the recorded fixtures with a configurable latency.
+# ARD hosts inside the fixtures are rewritten to the server, so item links and posters resolve locally. With
+# maxConcurrent set, requests beyond that many in flight are answered with 429 and a Retry-After header.
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.record_fixtures import FIXTURES, buildItemPage, getItemId
+
+_HOSTS = (b'https://api.ardmediathek.de', b'https://page.ardmediathek.de', b'https://img.ardmediathek.de')
+_POSTER = b'\xff\xd8\xff\xe0' + b'\x00' * 12 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server.fixtureServer
+        if not server.enter():
+            data = b'{"error": "too many requests"}'
+            server.count(self.path, len(data), True)
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retryAfter))
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        try:
+            if server.latency > 0:
+                time.sleep(server.latency)
+
+            status, data, contentType = server.getResponse(self.path)
+            server.count(self.path, len(data))
+        finally:
+            server.leave()
+
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FixtureServer:
+
+    def __init__(self, latency=0.0, fixtures=FIXTURES, maxConcurrent=None, retryAfter=1):
+        self.latency = latency
+        self.maxConcurrent = maxConcurrent
+        self.retryAfter = retryAfter
+        self._active = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self.reset()
+
+        with open(os.path.join(fixtures, 'asset.json'), encoding='utf-8') as f:
+            self._asset = json.load(f)
+        self._teasers = {getItemId(teaser['links']['target']['href']): teaser for teaser in self._asset['teasers']}
+        self._items = os.path.join(fixtures, 'items')
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fixtureServer = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.host = f'http://127.0.0.1:{self._server.server_address[1]}'
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes = 0
+            self.throttled = 0
+            self.paths = {}
+
+    def enter(self):
+        with self._lock:
+            if self.maxConcurrent is not None and self._active >= self.maxConcurrent:
+                return False
+
+            self._active += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._active -= 1
+
+    def count(self, path, size, throttled=False):
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            self.paths[path] = self.paths.get(path, 0) + 1
+            if throttled:
+                self.throttled += 1
+
+    def _rewrite(self, content):
+        data = json.dumps(content).encode('utf-8')
+        for host in _HOSTS:
+            data = data.replace(host, self.host.encode('ascii'))
+        return data
+
+    def _getPage(self, teasers, query, pageSize):
+        pageNumber = int(query.get('pageNumber', ['0'])[0] or 0)
+        pageSize = int(query.get('pageSize', [str(pageSize)])[0] or pageSize)
+        content = dict(self._asset)
+        content['pagination'] = {'pageNumber': pageNumber, 'pageSize': pageSize, 'totalElements': len(teasers)}
+        content['teasers'] = teasers[pageNumber * pageSize:(pageNumber + 1) * pageSize]
+        return content
+
+    def getResponse(self, path):
+        url = urllib.parse.urlparse(path)
+        query = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+
+        if '/asset/' in url.path:
+            return 200, self._rewrite(self._getPage(self._asset['teasers'], query, 24)), 'application/json'
+
+        if '/search/' in url.path:
+            words = query.get('searchString', [''])[0].split('|')[-1].lower().split()
+            teasers = [teaser for teaser in self._asset['teasers']
+                       if all(word in teaser['longTitle'].lower() for word in words)]
+            return 200, self._rewrite(self._getPage(teasers, query, 24)), 'application/json'
+
+        match = re.search(r'/item/([^/?]+)', url.path)
+        if match is not None and match.group(1) in self._teasers:
+            recorded = os.path.join(self._items, f'{match.group(1)}.json')
+            if os.path.exists(recorded):
+                with open(recorded, encoding='utf-8') as f:
+                    return 200, self._rewrite(json.load(f)), 'application/json'
+
+            return 200, self._rewrite(buildItemPage(self._teasers[match.group(1)])), 'application/json'
+
+        if '/image-service/' in url.path:
+            return 200, _POSTER, 'image/jpeg'
+
+        return 404, b'{}', 'application/json'
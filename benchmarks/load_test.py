@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Load test: many plugin invocations at once against one profile, the way skins with home screen widgets start
+# main.py. Every invocation is its own interpreter running ArdMediathekClient.DoSome on the fake Kodi modules
+# against a FixtureServer. Reports throughput, latency percentiles per route, how many upstream requests the
+# invocations cause and how long they wait on the stores they share on disk.
+#
+#   python benchmarks/load_test.py [--invocations 60] [--concurrency 12] [--mix list=4,search=2,item=2,all=1,home=1]
+#                                  [--latency 0.05] [--warmup] [--setting shared_cache=true] [--json result.json]
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, _ROOT)
+
+from benchmarks.driver import ROUTES  # noqa: E402
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+from benchmarks.record_fixtures import FIXTURES  # noqa: E402
+
+PERCENTILES = (50, 95, 99)
+FILTERS = ('Band', 'Live', 'Rock', 'Festival')
+# time spent on the shared stores: SQLite reads and writes including busy waits, waiting for the download of
+# another invocation, and the catalog sync and snapshot
+CONTENTION_SPANS = ('cache.get', 'cache.set', 'cache.wait', 'catalog.sync', 'catalog.snapshot')
+
+
+def getMix(value):
+    mix = {}
+    for entry in value.split(','):
+        route, _, weight = entry.partition('=')
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f'unknown route {route}')
+        mix[route] = int(weight or 1)
+    return mix
+
+
+def getPercentile(values, percentile):
+    # nearest rank
+    if len(values) == 0:
+        return 0
+
+    values = sorted(values)
+    return values[max(0, -(-len(values) * percentile // 100) - 1)]
+
+
+def getItemUrls(host):
+    with open(os.path.join(FIXTURES, 'asset.json'), encoding='utf-8') as f:
+        return [teaser['links']['target']['href'].replace('https://api.ardmediathek.de', host)
+                for teaser in json.load(f)['teasers']]
+
+
+def buildInvocations(count, mix, host, pages, seed):
+    # the same seed gives the same sequence of routes, so runs can be compared
+    rng = random.Random(seed)
+    routes = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    itemUrls = getItemUrls(host)
+
+    invocations = []
+    for route in routes:
+        arguments = ['--route', route]
+        if route in ('list', 'search'):
+            arguments += ['--page', str(rng.randrange(pages))]
+        if route == 'search':
+            arguments += ['--filter', rng.choice(FILTERS)]
+        if route == 'item':
+            arguments += ['--url', rng.choice(itemUrls[:10])]
+        invocations.append((route, arguments))
+
+    return invocations
+
+
+def invoke(host, arguments, settings, profile):
+    command = [sys.executable, '-m', 'benchmarks.driver', '--host', host] + arguments
+    for key, value in settings.items():
+        command += ['--setting', f'{key}={value}']
+
+    start = time.perf_counter()
+    process = subprocess.run(command, env=dict(os.environ, FAKE_KODI_PROFILE=profile), cwd=_ROOT,
+                             capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        return {'elapsed': elapsed, 'error': lines[-1] if len(lines) > 0 else f'exit {process.returncode}'}
+
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['elapsed'] = elapsed
+    return result
+
+
+def getCacheStats(profile):
+    # the counters every invocation adds to in the shared cache database
+    paths = [os.path.join(root, name) for root, _, files in os.walk(profile) for name in files
+             if name.startswith('cache-') and name.endswith('.db')]
+    stats = {}
+    for path in paths:
+        connection = sqlite3.connect(path)
+        try:
+            for name, value in connection.execute('SELECT name, value FROM stats'):
+                stats[name] = stats.get(name, 0) + value
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.close()
+
+    return stats
+
+
+def run(server, invocations, settings, concurrency, profile):
+    results = [None] * len(invocations)
+    active = [0, 0]
+    lock = threading.Lock()
+
+    def runOne(index):
+        route, arguments = invocations[index]
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        try:
+            results[index] = dict(invoke(server.host, arguments, settings, profile), route=route)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    server.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(runOne, range(len(invocations))))
+    wall = time.perf_counter() - start
+
+    return results, wall, active[1]
+
+
+def summarize(results, wall, peak, server, profile):
+    succeeded = [result for result in results if 'error' not in result]
+    errors = {}
+    for result in results:
+        if 'error' in result:
+            errors[result['error']] = errors.get(result['error'], 0) + 1
+
+    routes = {}
+    for route in sorted({result['route'] for result in results}):
+        measured = [result for result in succeeded if result['route'] == route]
+        routes[route] = {
+            'count': len([result for result in results if result['route'] == route]),
+            'errors': len([result for result in results if result['route'] == route and 'error' in result]),
+            'elapsed': {p: getPercentile([result['elapsed'] for result in measured], p) for p in PERCENTILES},
+            'shown': {p: getPercentile([result['shown'] for result in measured], p) for p in PERCENTILES}
+        }
+
+    contention = {}
+    for name in CONTENTION_SPANS:
+        totals = [result['spans'][name]['total'] / 1000 for result in succeeded if name in result['spans']]
+        contention[name] = {
+            'invocations': len(totals),
+            'total': sum(totals),
+            'max': max(totals) if len(totals) > 0 else 0,
+            **{p: getPercentile(totals, p) for p in PERCENTILES}
+        }
+
+    distinct = len(server.paths)
+    return {
+        'invocations': len(results),
+        'errors': errors,
+        'wall': wall,
+        'throughput': len(results) / wall if wall > 0 else 0,
+        'peakConcurrency': peak,
+        'elapsed': {p: getPercentile([result['elapsed'] for result in succeeded], p) for p in PERCENTILES},
+        'routes': routes,
+        'upstream': {
+            'requests': server.requests,
+            'bytes': server.bytes,
+            'throttled': server.throttled,
+            'distinct': distinct,
+            # requests per invocation, and how often the same URL was fetched; 1.0 is every URL exactly once
+            'perInvocation': server.requests / len(results) if len(results) > 0 else 0,
+            'duplication': server.requests / distinct if distinct > 0 else 0,
+            'duplicated': len([count for count in server.paths.values() if count > 1])
+        },
+        'contention': contention,
+        'cache': getCacheStats(profile)
+    }
+
+
+def printSummary(summary):
+    elapsed = summary['elapsed']
+    print(f'{summary["invocations"]} invocations in {summary["wall"]:.2f} s, {summary["throughput"]:.1f}/s, '
+          f'peak concurrency {summary["peakConcurrency"]}')
+    print(f'latency p50 {elapsed[50] * 1000:.0f} ms  p95 {elapsed[95] * 1000:.0f} ms  p99 {elapsed[99] * 1000:.0f} ms')
+    for error, count in summary['errors'].items():
+        print(f'  {count}x failed: {error}')
+
+    print()
+    print(f'{"route":8} {"count":>5} {"errors":>6}   {"p50":>7} {"p95":>7} {"p99":>7}   '
+          f'{"shown p50":>9} {"p95":>7} {"p99":>7}')
+    for route, metrics in summary['routes'].items():
+        print(f'{route:8} {metrics["count"]:5d} {metrics["errors"]:6d}   ' +
+              ' '.join(f'{metrics["elapsed"][p] * 1000:5.0f}ms' for p in PERCENTILES) + '   ' +
+              f'{metrics["shown"][50] * 1000:7.0f}ms ' +
+              ' '.join(f'{metrics["shown"][p] * 1000:5.0f}ms' for p in PERCENTILES[1:]))
+
+    upstream = summary['upstream']
+    print()
+    print(f'upstream {upstream["requests"]} requests ({upstream["perInvocation"]:.2f} per invocation), '
+          f'{upstream["bytes"] / 1024:.1f} KiB, {upstream["distinct"]} distinct URLs, '
+          f'{upstream["duplication"]:.2f} requests per URL, {upstream["duplicated"]} URLs fetched more than once, '
+          f'{upstream["throttled"]} throttled')
+
+    cache = summary['cache']
+    print(f'cache    {cache.get("hits", 0)} hits, {cache.get("misses", 0)} misses, '
+          f'{cache.get("coalesced", 0)} coalesced')
+
+    print()
+    print(f'{"shared state":16} {"invocations":>11} {"total":>9} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}')
+    for name, metrics in summary['contention'].items():
+        print(f'{name:16} {metrics["invocations"]:11d} {metrics["total"] * 1000:7.0f}ms ' +
+              ' '.join(f'{metrics[p] * 1000:6.1f}ms' for p in PERCENTILES) + f' {metrics["max"] * 1000:6.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--invocations', type=int, default=60)
+    parser.add_argument('--concurrency', type=int, default=12, help='invocations running at the same time')
+    parser.add_argument('--mix', type=getMix, default=getMix('list=4,search=2,item=2,all=1,home=1'),
+                        help='routes and their weights')
+    parser.add_argument('--pages', type=int, default=2, help='list and search pages are picked from the first N')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated server latency in seconds')
+    parser.add_argument('--max-concurrent', type=int, help='answer requests beyond this many in flight with 429')
+    parser.add_argument('--warmup', action='store_true', help='run every route once before the load starts')
+    parser.add_argument('--setting', action='append', default=[], metavar='ID=VALUE')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write the summary to this file')
+    args = parser.parse_args()
+
+    # tracing gives the time every invocation spent on the shared stores
+    settings = dict({'trace_enabled': 'true'}, **dict(setting.split('=', 1) for setting in args.setting))
+
+    server = FixtureServer(args.latency, maxConcurrent=args.max_concurrent).start()
+    try:
+        with tempfile.TemporaryDirectory() as profile:
+            if args.warmup:
+                run(server, [(route, ['--route', route]) for route in args.mix], settings, 1, profile)
+
+            invocations = buildInvocations(args.invocations, args.mix, server.host, args.pages, args.seed)
+            results, wall, peak = run(server, invocations, settings, args.concurrency, profile)
+            summary = summarize(results, wall, peak, server, profile)
+    finally:
+        server.stop()
+
+    printSummary(summary)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Writes the page-gateway fixtures served by fixture_server.py.
+#
+#   python benchmarks/record_fixtures.py --live [--items 30]   record the Rockpalast catalog from the ARD
+#   python benchmarks/record_fixtures.py --synthetic           generate a deterministic catalog of the same shape
+#
+# fixtures/asset.json holds every teaser of the show in one asset widget response, fixtures/items/<id>.json
+# holds recorded item pages. Item pages that were not recorded are derived from their teaser.
+
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from libs.ardmediathek_api import getAssetUrl  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CHANNEL = 'wdr'
+MEDIATHEK_ID = 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0'
+
+
+def getItemId(href):
+    return re.search(r'/item/([^/?]+)', href).group(1)
+
+
+def _buildTeaser(i):
+    itemId = f'Y3JpZDovL3dkci5kZS9CZWl0cmFnLXJvY2twYWxhc3Qt{i:06d}'
+    year = 2022 - i // 12
+    month = 12 - i % 12
+    music = i % 9 == 4
+    title = f'Musik bei Rockpalast: Band {i}' if music else f'Band {i} - Live at Rockpalast {1975 + i % 45}'
+
+    return {
+        'availableTo': '2020-06-30T21:59:00Z' if i % 17 == 16 else f'{2027 + i % 3}-12-31T22:59:00Z',
+        'broadcastedOn': f'{year}-{month:02d}-{(i * 7) % 28 + 1:02d}T22:{(i * 13) % 60:02d}:00Z',
+        'duration': 180 + i % 4 * 30 if music else 2700 + (i * 397) % 5400,
+        'id': itemId,
+        'images': {
+            'aspect16x9': {'alt': f'Band {i}', 'producerName': 'WDR', 'title': f'Band {i}',
+                           'src': f'https://api.ardmediathek.de/image-service/images/urn:ard:image:{i:016x}'
+                                  f'?w={{width}}&ch=ae4d9f4f4f5f4d1a'},
+            'aspect1x1': {'alt': f'Band {i}', 'producerName': 'WDR', 'title': f'Band {i}',
+                          'src': f'https://api.ardmediathek.de/image-service/images/urn:ard:image:{i:016x}'
+                                 f'?w={{width}}&ch=1x1'}
+        },
+        'links': {
+            'self': {'id': itemId, 'href': f'https://api.ardmediathek.de/page-gateway/teasers/{CHANNEL}/items/'
+                                           f'{itemId}?devicetype=pc&embedded=true'},
+            'target': {'id': itemId, 'href': f'https://api.ardmediathek.de/page-gateway/pages/{CHANNEL}/item/'
+                                             f'{itemId}?devicetype=pc&embedded=true'}
+        },
+        'longTitle': title,
+        'mediumTitle': title,
+        'publicationService': {'name': 'WDR', 'partner': 'wdr'},
+        'shortTitle': f'Band {i}',
+        'show': {'id': MEDIATHEK_ID, 'title': 'Rockpalast', 'coreId': 'rockpalast'},
+        'synopsis': f'Rockpalast concert of Band {i}, recorded {"at the Loreley" if i % 3 else "in Essen"}.',
+        'titleVisible': True,
+        'tracking': {'aggregationLevelId': 38, 'atiCustomVars': {'clipTitle': title, 'mediaType': 'video'}},
+        'type': 'ondemand'
+    }
+
+
+def buildItemPage(teaser):
+    # the quality ladder of every fifth item stops at 540p, like older recordings in the Mediathek
+    qualities = (0, 1, 2) if sum(map(ord, teaser['id'])) % 5 == 0 else (0, 1, 2, 3)
+    stream = teaser['links']['target']['href'].replace('/page-gateway/pages/', '/video/').split('?')[0]
+    return {
+        'fskRating': 'NONE',
+        'id': teaser['id'],
+        'title': teaser['longTitle'],
+        'widgets': [{
+            'availableTo': teaser['availableTo'],
+            'broadcastedOn': teaser['broadcastedOn'],
+            'id': teaser['id'],
+            'image': teaser['images']['aspect16x9'],
+            'mediaCollection': {'embedded': {
+                '_defaultQuality': ['auto'],
+                '_duration': teaser['duration'],
+                '_isLive': False,
+                '_mediaArray': [{'_plugin': 1, '_mediaStreamArray': [
+                    {'_quality': 'auto', '_stream': f'{stream}.m3u8'}
+                ] + [{'_quality': quality, '_stream': f'{stream}_{quality}.mp4'} for quality in qualities]}],
+                '_type': 'video'
+            }},
+            'show': teaser['show'],
+            'synopsis': teaser['synopsis'],
+            'title': teaser['longTitle'],
+            'type': 'player_ondemand'
+        }]
+    }
+
+
+def _write(name, content):
+    path = os.path.join(FIXTURES, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(content, f, indent=1, ensure_ascii=False)
+
+
+def synthetic(count):
+    teasers = [_buildTeaser(i) for i in range(count)]
+    teasers.sort(key=lambda teaser: teaser['broadcastedOn'], reverse=True)
+    _write('asset.json', {
+        'aZContent': False,
+        'compilationType': 'itemsOfShow',
+        'id': MEDIATHEK_ID,
+        'pagination': {'pageNumber': 0, 'pageSize': count, 'totalElements': count},
+        'teasers': teasers,
+        'title': 'Rockpalast',
+        'type': 'gridlist'
+    })
+
+
+def live(items):
+    import requests
+
+    url = getAssetUrl(CHANNEL, MEDIATHEK_ID)
+    content = None
+    pageNumber = 0
+    while True:
+        page = requests.get(url.replace('{pageNumber}', str(pageNumber)).replace('{pageSize}', '50'), timeout=30)
+        page.raise_for_status()
+        page = page.json()
+        if content is None:
+            content = page
+        else:
+            content['teasers'] += page['teasers']
+
+        if page['pagination']['totalElements'] <= (pageNumber + 1) * 50:
+            break
+        pageNumber += 1
+
+    content['pagination'] = {'pageNumber': 0, 'pageSize': len(content['teasers']),
+                             'totalElements': len(content['teasers'])}
+    _write('asset.json', content)
+
+    for teaser in content['teasers'][:items]:
+        href = teaser['links']['target']['href']
+        page = requests.get(href, timeout=30)
+        page.raise_for_status()
+        _write(os.path.join('items', f'{getItemId(href)}.json'), page.json())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--live', action='store_true')
+    group.add_argument('--synthetic', action='store_true')
+    parser.add_argument('--items', type=int, default=30, help='item pages to record with --live')
+    parser.add_argument('--teasers', type=int, default=120, help='teasers to generate with --synthetic')
+    args = parser.parse_args()
+
+    if args.live:
+        live(args.items)
+    else:
+        synthetic(args.teasers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Offline benchmark suite: every route with the page sizes and skip_itemPage settings against the recorded
+# fixtures, each invocation in its own interpreter. 'cold' starts with an empty profile, 'warm' repeats the
+# invocation on the profile the cold run left behind. 'shown' is the time until the listing is handed to Kodi,
+# 'time' includes the work done after that, e.g. the next page prefetch.
+#
+#   python benchmarks/run_benchmarks.py [--latency 0.05] [--runs 3] [--json result.json]
+#   python benchmarks/run_benchmarks.py --compare baseline.json [--threshold 0.2]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, _ROOT)
+
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+
+# every page size the settings offer, 5 to 30 items
+PAGE_ITEMCOUNTS = ('0', '1', '2', '3', '4', '5')
+METRICS = ('shown', 'time', 'requests', 'bytes', 'maxrss')
+
+
+def getScenarios():
+    yield 'home', {}
+    yield 'item', {}
+    yield 'all', {'catalog_enabled': 'true'}
+    yield 'all', {'catalog_enabled': 'false'}
+    for route in ('list', 'search'):
+        for itemCount in PAGE_ITEMCOUNTS:
+            for skip in ('false', 'true'):
+                yield route, {'page_itemCount': itemCount, 'skip_itemPage': skip}
+
+
+def getName(route, settings):
+    if len(settings) == 0:
+        return route
+
+    if 'catalog_enabled' in settings:
+        return f'{route}/{"catalog" if settings["catalog_enabled"] == "true" else "remote"}'
+
+    return f'{route}/{settings["page_itemCount"]}/{"skip" if settings["skip_itemPage"] == "true" else "pages"}'
+
+
+def _invoke(server, route, settings, profile):
+    command = [sys.executable, '-m', 'benchmarks.driver', '--host', server.host, '--route', route]
+    for key, value in settings.items():
+        command += ['--setting', f'{key}={value}']
+
+    server.reset()
+    env = dict(os.environ, FAKE_KODI_PROFILE=profile)
+    output = subprocess.run(command, env=env, cwd=_ROOT, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['requests'] = server.requests
+    result['bytes'] = server.bytes
+    return result
+
+
+def _median(results, key):
+    values = sorted(result[key] or 0 for result in results)
+    return values[len(values) // 2]
+
+
+def run(server, runs):
+    results = {}
+    for route, settings in getScenarios():
+        cold = []
+        warm = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as profile:
+                cold.append(_invoke(server, route, settings, profile))
+                warm.append(_invoke(server, route, settings, profile))
+
+        name = getName(route, settings)
+        results[name] = {
+            'cold': {key: _median(cold, key) for key in METRICS},
+            'warm': {key: _median(warm, key) for key in METRICS}
+        }
+        _printRow(name, results[name])
+
+    return results
+
+
+def _printRow(name, result):
+    columns = []
+    for state in ('cold', 'warm'):
+        metrics = result[state]
+        columns.append(f'{metrics["shown"] * 1000:8.1f}ms {metrics["time"] * 1000:8.1f}ms {metrics["requests"]:5d} '
+                       f'{metrics["bytes"] / 1024:8.1f}K {metrics["maxrss"] / 1024 / 1024:6.1f}M')
+    print(f'{name:18} {"   ".join(columns)}')
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for state in ('cold', 'warm'):
+            for key in METRICS:
+                if key not in baseline[name][state]:
+                    continue
+
+                old = baseline[name][state][key]
+                new = result[state][key]
+                # request counts have to match exactly, everything else is allowed some noise
+                limit = old if key == 'requests' else old * (1 + threshold)
+                if new > limit:
+                    regressions.append(f'{name} {state} {key}: {old} -> {new}')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated server latency in seconds')
+    parser.add_argument('--max-concurrent', type=int, help='answer requests beyond this many in flight with 429')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='baseline written by --json, exits with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = FixtureServer(args.latency, maxConcurrent=args.max_concurrent).start()
+    print(f'{"scenario":18} {"cold":>45}   {"warm":>45}')
+    print(f'{"":18} {"shown       time  reqs     bytes    rss":>45}   {"shown       time  reqs     bytes    rss":>45}')
+    try:
+        results = run(server, args.runs)
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        sys.exit(1 if len(regressions) > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,80 +15,230 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import requests
-import json
+import time
+from functools import partial
 
+from libs.http_transport import getDefaultTransport
+from libs.page_parser import PageParser
+from libs.tracing import getTracer
 
-def _getContent(url):
-    page = requests.get(url)
-    return json.loads(page.content)
+ALL_PAGESIZE = 50
 
 
-class ARDMediathekAPI:
+def getAssetUrl(channel, mediathek_id):
+    return f'https://api.ardmediathek.de/page-gateway/widgets/{channel}/asset/{mediathek_id}' \
+           '?pageNumber={pageNumber}&pageSize={' \
+           'pageSize}&embedded=true&seasoned=false&seasonNumber=&withAudiodescription=false' \
+           '&withOriginalWithSubtitle=false&withOriginalversion=false'
 
-    def __init__(self, url, tag):
 
-        self._posterWidth = 480
+def getSearchUrl(channel):
+    return f'https://page.ardmediathek.de/page-gateway/widgets/{channel}/search/vod' \
+           '?searchString={searchstring}&pageNumber={pageNumber}'
 
-        if tag is not None:
-            if 'pageNumber' in tag:
-                pageNumber = tag.get('pageNumber')
-                url = url.replace('{pageNumber}', str(pageNumber))
-            if 'pageSize' in tag:
-                pageSize = tag.get('pageSize')
-                url = url.replace('{pageSize}', str(pageSize))
-            if 'posterWidth' in tag:
-                self._posterWidth = tag.get('posterWidth')
-            if 'quality' in tag:
-                self._quality_id = tag.get('quality')
 
-        self._content = _getContent(url)
+def getCatalogPage(url, cache, transport, pageNumber, pageSize, refresh=False):
+    # keep the '{width}' placeholder, the catalog stores the poster template; the pages go through the cache, so
+    # invocations syncing at the same time download each page once
+    tag = {
+        'pageNumber': pageNumber,
+        'pageSize': pageSize,
+        'posterWidth': '{width}'
+    }
 
-    def _hasContent(self):
-        return self._content is not None
+    API = ARDMediathekAPI(url, tag, cache, transport, refresh)
+    return API.getPagination(), API.getTeaser()
 
-    def getPagination(self):
-        if self._hasContent():
-            return self._content['pagination']
 
-    def getTeaser(self):
+def _getAllPages(getPage, pageSize, workers, strict=False):
+    # getPage(pageNumber) returns (pagination, teasers); the first page tells how many there are, the others are
+    # fetched concurrently
+    from concurrent.futures import ThreadPoolExecutor
+
+    def getOtherPage(pageNumber):
+        if strict:
+            return getPage(pageNumber)[1] or []
+
+        # a missing page leaves a gap in the listing instead of failing it
         try:
-            teasers = []
-            if self._hasContent():
-                for teaser in self._content['teasers']:
-                    image = teaser['images']['aspect16x9']['src'].replace('{width}', str(self._posterWidth))
-                    teasers.append({'availableTo': teaser['availableTo'],
-                                    'broadcastedOn': teaser['broadcastedOn'],
-                                    'duration': teaser['duration'],
-                                    'poster': image,
-                                    'title': teaser['longTitle'],
-                                    'url': teaser['links']['target']['href']})
-
-                return teasers
-        finally:
+            return getPage(pageNumber)[1] or []
+        except Exception:
+            return []
+
+    pagination, teasers = getPage(0)
+    pages = [teasers or []]
+    if pagination is not None and pagination.totalElements > pageSize:
+        count = (pagination.totalElements + pageSize - 1) // pageSize
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages += executor.map(getOtherPage, range(1, count))
+
+    # the widget can shift while its pages are fetched, so a teaser may show up on two of them
+    result = {}
+    for page in pages:
+        for teaser in page:
+            result.setdefault(teaser.url, teaser)
+
+    return list(result.values())
+
+
+def getAllTeasers(url, posterWidth, cache=None, transport=None, pageSize=ALL_PAGESIZE, workers=8):
+    def getPage(pageNumber):
+        tag = {
+            'pageNumber': pageNumber,
+            'pageSize': pageSize,
+            'posterWidth': posterWidth
+        }
+
+        page = openPage(url, tag, cache, transport)
+        teasers = page.parse() or []
+        return page.pagination, teasers
+
+    return _getAllPages(getPage, pageSize, workers)
+
+
+def getCatalogTeasers(url, cache, transport, pageSize, workers=8):
+    # the whole widget for a catalog without anything to sync against; a failing page fails the sync, the catalog
+    # must not be marked complete with a gap
+    return _getAllPages(partial(getCatalogPage, url, cache, transport, pageSize=pageSize), pageSize, workers, True)
+
+
+def resolveItem(url, tag, cache=None, transport=None, streamCache=None):
+    quality = tag.get('quality') if tag is not None else None
+    if streamCache is not None:
+        item = streamCache.get(url, quality)
+        if item is not None:
+            return item
+
+    item = ARDMediathekAPI(url, tag, cache, transport).getItem()
+    if item is not None and streamCache is not None:
+        streamCache.set(url, item)
+
+    return item
+
+
+def _getContent(url, cache=None, transport=None, refresh=False):
+    # a refresh downloads the url again even if it is cached, it only shares a download already in flight
+    tracer = getTracer()
+    owner = False
+    if cache is not None:
+        if not refresh:
+            with tracer.span('cache.get'):
+                content = cache.get(url)
+            if content is not None:
+                yield content
+                return
+
+        # another invocation may be downloading the same url right now, its result is shared through the cache
+        owner = cache.acquire(url)
+        if owner:
+            # the previous owner may have stored the response between the lookup above and the acquire
+            content = None if refresh else cache.get(url, count=False)
+            if content is not None:
+                cache.release(url)
+                yield content
+                return
+        else:
+            with tracer.span('cache.wait'):
+                content = cache.waitFor(url)
+            if content is not None:
+                yield content
+                return
+
+    if transport is None:
+        transport = getDefaultTransport()
+
+    # only the time spent inside the transport counts, not the consumer working between the chunks
+    try:
+        chunks = []
+        status = None
+        elapsed = 0.0
+        start = time.perf_counter()
+        for status, chunk in transport.iterContent(url):
+            elapsed += time.perf_counter() - start
+            if cache is not None:
+                chunks.append(chunk)
+            yield chunk
+            start = time.perf_counter()
+        elapsed += time.perf_counter() - start
+        tracer.add('http', elapsed)
+
+        if cache is not None and status == 200:
+            with tracer.span('cache.set'):
+                cache.set(url, b''.join(chunks))
+    finally:
+        if owner:
+            cache.release(url)
+
+
+def _getUrl(url, tag):
+    if tag is not None:
+        if 'pageNumber' in tag:
+            url = url.replace('{pageNumber}', str(tag.get('pageNumber')))
+        if 'pageSize' in tag:
+            url = url.replace('{pageSize}', str(tag.get('pageSize')))
+
+    return url
+
+
+def _getParser(chunks, tag):
+    posterWidth = 480
+    quality = None
+    if tag is not None:
+        posterWidth = tag.get('posterWidth', posterWidth)
+        quality = tag.get('quality')
+
+    return PageParser(chunks, posterWidth, quality)
+
+
+def openPage(url, tag, cache=None, transport=None, refresh=False):
+    # streaming counterpart of ARDMediathekAPI: teasers are yielded by iterTeasers() while the page downloads
+    return _getParser(_getContent(_getUrl(url, tag), cache, transport, refresh), tag)
+
+
+def openPageWithin(url, tag, budget, cache, transport=None):
+    # returns (page, stale); with an expired copy in the cache the download gets `budget` seconds, after that the
+    # expired copy is used and the download goes on in the background to refresh the cache for the next visit
+    import threading
+
+    url = _getUrl(url, tag)
+    stale = cache.getStale(url)
+    if stale is None:
+        return _getParser(_getContent(url, cache, transport), tag), False
+
+    content = []
+    done = threading.Event()
+
+    def download():
+        try:
+            content.append(b''.join(_getContent(url, cache, transport)))
+        except Exception:
             pass
+        finally:
+            done.set()
+
+    threading.Thread(target=download).start()
+    done.wait(budget)
+    if len(content) > 0:
+        return _getParser([content[0]], tag), False
+
+    return _getParser([stale], tag), True
+
+
+class ARDMediathekAPI:
+
+    def __init__(self, url, tag, cache=None, transport=None, refresh=False):
+        parser = openPage(url, tag, cache, transport, refresh)
+
+        # only the records are kept, the response is never held as a whole tree
+        self._teasers = parser.parse()
+        self._pagination = parser.pagination
+        self._item = parser.item
+
+    def getPagination(self):
+        return self._pagination
+
+    def getTeaser(self):
+        return self._teasers
 
     def getItem(self):
-        if self._hasContent():
-            item = self._content['widgets'][0]
-            poster = item['image']['src'].replace('{width}', str(self._posterWidth))
-            embedded = item['mediaCollection']['embedded']
-            mediastreamarray = embedded['_mediaArray'][0]['_mediaStreamArray']
-            url = self._getItemUrl(mediastreamarray)
-            duration = embedded['_duration']
-
-            if url is not None:
-                return {
-                    'title': self._content['title'],
-                    'availableTo': item['availableTo'],
-                    'broadcastedOn': item['broadcastedOn'],
-                    'plot': item['synopsis'],
-                    'poster': poster,
-                    'url': url,
-                    'duration': duration
-                }
-
-    def _getItemUrl(self, mediastreamarray):
-        for stream in mediastreamarray:
-            if stream['_quality'] == self._quality_id:
-                return stream['_stream']
+        return self._item
@@ -15,13 +15,21 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import json
+import os
 import sys
 import urllib
 import urllib.parse
-import uuid
+from functools import cached_property, partial
 
 from libs.kodion.addon import Addon
-from libs.ardmediathek_api import ARDMediathekAPI
+from libs.ardmediathek_api import getAllTeasers, getAssetUrl, getCatalogPage, getCatalogTeasers, getSearchUrl, \
+    openPage, openPageWithin, resolveItem
+from libs.http_transport import DeadlineTransport, HttpTransport
+from libs.profiler import getKeepCount, runProfiled
+from libs.stores import getNamespace, getPageSize, getProfilePath, getSnapshotPath, openCache, openCatalog, \
+    openCatalogSnapshot, openImageCache, openStreamCache
+from libs.teaser_filter import getTeaserFilter
+from libs.tracing import Tracer, setTracer
 from libs.kodion.gui_manager import *
 
 from libs.kodion.utils import Utils as kodionUtils
@@ -53,17 +61,16 @@ def get_query_args(s_args):
 
 class ArdMediathekClient:
 
+    _MAX_WORKERS = 8
+    _PREFETCH_BUDGET = 10
+    _POSTER_BUDGET = 1.5
+
     def __init__(self, addon_id, mediathek_id, channel, show_name, fanart_id):
 
         # -- Constants ----------------------------------------------
         self._ADDON_ID = addon_id
-        self._BASEURL = f'https://api.ardmediathek.de/page-gateway/widgets/{channel}/asset/{mediathek_id}' \
-                        '?pageNumber={pageNumber}&pageSize={' \
-                        'pageSize}&embedded=true&seasoned=false&seasonNumber=&withAudiodescription=false' \
-                        '&withOriginalWithSubtitle=false&withOriginalversion=false'
-
-        self._SEARCHURL = f'https://page.ardmediathek.de/page-gateway/widgets/{channel}/search/vod' \
-                          '?searchString={searchstring}&pageNumber={pageNumber}'
+        self._BASEURL = getAssetUrl(channel, mediathek_id)
+        self._SEARCHURL = getSearchUrl(channel)
 
         self._showname = show_name
         self._DEFAULT_IMAGE_URL = ''
@@ -77,133 +84,418 @@ class ArdMediathekClient:
             fanart = f'special://home/addons/{self._ADDON_ID}/resources/assets/720p/fanart.jpg'
 
         fanart = kodionUtils.translatePath(fanart)
-        self._guiManager = GuiManager(sys.argv[1], self._ADDON_ID, self._DEFAULT_IMAGE_URL, fanart)
-        self._POSTERWIDTH = int(width/3)
+        self._guiManager = GuiManager(sys.argv[1], self._ADDON_ID, self._DEFAULT_IMAGE_URL, fanart, True)
+        self._POSTERWIDTH = getPosterWidth(width)
         self._guiManager.setContent('movies')
 
         # -- Settings -----------------------------------------------
+        # settings, translations and stores are resolved on first use, so a route only pays for what it needs
         self._addon = Addon(self._ADDON_ID)
-        self._t = Translations(self._addon)
-        self._quality_id = int(self._addon.getSetting('quality'))
-        self._PAGESIZE = {
-            '0': 5,
-            '1': 10,
-            '2': 15,
-            '3': 20,
-            '4': 25,
-            '5': 30
-        }[self._addon.getSetting('page_itemCount')]
-        self._skip_itemPage = (self._addon.getSetting('skip_itemPage') == 'true')
-        # self._suppress_MusicClips = (addon.getSetting('suppress_MusicClips') == 'true')
-        # self._suppress_durationSeconds = {
-        #     '0': 0,
-        #     '1': 30,
-        #     '2': 60,
-        #     '3': 180,
-        #     '4': 300
-        # }[addon.getSetting('suppress_duration')]
+        self._namespace = getNamespace(channel, mediathek_id)
 
         self._DirectoryBuilded = False
-
-    def setItemView(self, url, tag=None):
-
-        tag = {
+        self._nextPage = None
+        self._stale = False
+
+    @cached_property
+    def _t(self):
+        return Translations(self._addon, self._profile)
+
+    @cached_property
+    def _quality_id(self):
+        return int(self._addon.getSetting('quality'))
+
+    @cached_property
+    def _PAGESIZE(self):
+        return getPageSize(self._addon)
+
+    @cached_property
+    def _teaserFilter(self):
+        return getTeaserFilter(self._addon)
+
+    @cached_property
+    def _skip_itemPage(self):
+        return self._addon.getSetting('skip_itemPage') == 'true'
+
+    @cached_property
+    def _latencyBudget(self):
+        return {
+            '0': 0,
+            '1': 1,
+            '2': 2,
+            '3': 3,
+            '4': 5
+        }[self._addon.getSetting('latency_budget')]
+
+    @cached_property
+    def _profile(self):
+        return getProfilePath(self._addon)
+
+    @cached_property
+    def _tracer(self):
+        # kodi_debug turns tracing on through the debug settings of Addon
+        return setTracer(Tracer(self._addon.getSetting('trace_enabled') == 'true'))
+
+    @cached_property
+    def _transport(self):
+        return HttpTransport()
+
+    @cached_property
+    def _cache(self):
+        return openCache(self._addon, self._profile)
+
+    @cached_property
+    def _streamCache(self):
+        return openStreamCache(self._addon, self._profile)
+
+    @cached_property
+    def _images(self):
+        if self._addon.getSetting('poster_preload') != 'true':
+            return None
+
+        return openImageCache(self._addon, self._profile)
+
+    @cached_property
+    def _catalog(self):
+        return openCatalog(self._addon, self._profile, self._namespace)
+
+    @cached_property
+    def _snapshot(self):
+        return openCatalogSnapshot(self._addon, self._profile, self._namespace)
+
+    def _reportTrace(self, route):
+        path = None
+        if self._addon.getSetting('trace_file') == 'true':
+            path = os.path.join(self._profile, 'traces.jsonl')
+
+        # only the stores and the transport this invocation opened are reported, tracing alone never opens them
+        cache = self.__dict__.get('_cache')
+        transport = self.__dict__.get('_transport')
+        self._tracer.report(self._ADDON_ID, route, path, cache.getStats() if cache is not None else None,
+                            transport.getSummary() if transport is not None else None)
+
+    def _getItemTag(self):
+        return {
             'posterWidth': self._POSTERWIDTH,
             'quality': self._quality_id
         }
 
-        API = ARDMediathekAPI(url, tag)
-        item = API.getItem()
+    def _fetchItem(self, url, cache, transport, streamCache):
+        try:
+            return resolveItem(url, self._getItemTag(), cache, transport, streamCache)
+        except Exception:
+            return None
+
+    def _fetchItems(self, urls):
+        from concurrent.futures import ThreadPoolExecutor
+
+        # the stores are resolved here, before the workers would race for them
+        fetchItem = partial(self._fetchItem, cache=self._cache, transport=self._transport,
+                            streamCache=self._streamCache)
+
+        # urls may be a generator over a page that is still downloading, every url is submitted as it arrives
+        with self._tracer.span('items.fetch'), ThreadPoolExecutor(max_workers=self._MAX_WORKERS) as executor:
+            return list(executor.map(fetchItem, urls))
+
+    def _getThumbs(self, posters, limit=None):
+        # missing posters are fetched concurrently, those that miss the budget stay remote for Kodi to load
+        images = self._images
+        if images is None:
+            return {}
+
+        thumbs = {poster: images.getPath(poster) for poster in posters}
+        missing = [poster for poster in posters[:limit] if thumbs[poster] is None]
+        if len(missing) > 0:
+            from concurrent.futures import ThreadPoolExecutor, wait
+
+            transport = self._transport
+            executor = ThreadPoolExecutor(max_workers=self._MAX_WORKERS)
+            futures = {executor.submit(images.fetch, poster, transport): poster for poster in missing}
+            done = wait(futures, timeout=self._POSTER_BUDGET).done
+            # cancel_futures needs Python 3.9, Kodi 19 and 20 ship 3.8 on some platforms
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+            for future in done:
+                if future.exception() is None:
+                    thumbs[futures[future]] = future.result()
+
+            images.evict()
+
+        return thumbs
+
+    def _addItem(self, item, thumb=None):
+        title = item.title
+
+        infoLabels = {
+            'Title': title,
+            'Plot': item.plot,
+            'Date': utils.formatTimestamp(item.broadcastedOn, '%d.%m.%Y'),
+            'Aired': item.broadcastedOn,
+            'Duration': item.duration
+        }
+
+        self._guiManager.addItem(title=title, url=item.url, poster=thumb or item.poster, _type='video',
+                                 infoLabels=infoLabels)
+        self._DirectoryBuilded = True
+
+    def setItemView(self, url, tag=None):
+        item = resolveItem(url, self._getItemTag(), self._cache, self._transport, self._streamCache)
         if item is not None:
-            title = item['title']
-
-            infoLabels = {
-                'Title': title,
-                'Plot': item['plot'],
-                'Date': item['broadcastedOn'],
-                'Aired': item['broadcastedOn'],
-                'Duration': item['duration']
-            }
+            with self._tracer.span('images.preload'):
+                thumbs = self._getThumbs([item.poster])
+
+            with self._tracer.span('gui.addItem'):
+                self._addItem(item, thumbs.get(item.poster))
+
+    def addItemPage(self, teaser, thumb=None):
+        title = teaser.title
+        t = self._t
 
-            self._guiManager.addItem(title=title, url=item['url'], poster=item['poster'], _type='video',
-                                     infoLabels=infoLabels)
-            self._DirectoryBuilded = True
-
-    # def _isValidTeaser(self, teaser):
-    #     if self._suppress_MusicClips and 'Musik bei Inas Nacht:' in teaser['title']:
-    #         return False
-    #
-    #     if self._suppress_durationSeconds > 0 and teaser['duration'] < self._suppress_durationSeconds:
-    #         return False
-    #
-    #     return True
-
-    def addItemPage(self, teaser):
-        title = teaser['title']
-        duration, unit = utils.getDuration(int(teaser['duration']))
-        duration = {
-            'hours': duration + f' {self._t.getString(HOURS)}',
-            'minutes': duration + f' {self._t.getString(MINUTES)}',
-            'seconds': duration + f' {self._t.getString(SECONDS)}',
-        }[unit]
-
-        broadcastedOn = utils.formatDateTime(utils.getDateTime(teaser['broadcastedOn'], '%Y-%m-%dT%H:%M:%SZ'),
-                                             '%d.%m.%Y, %H:%M:%S')
-        availableTo = utils.formatDateTime(utils.getDateTime(teaser['availableTo'], '%Y-%m-%dT%H:%M:%SZ'),
-                                           '%d.%m.%Y, %H:%M:%S')
-
-        plot = f'[B]{title}[/B]\n\n[B]{self._t.getString(DURATION)}[/B]: {duration}\n' \
-               f'[B]{self._t.getString(BROADCASTEDON)}[/B]: {broadcastedOn}\n' \
-               f'[B]{self._t.getString(AVAILABLETO)}[/B]: {availableTo} '
+        # the units of getDuration are the names of their translations
+        duration, unit = utils.getDuration(int(teaser.duration))
+        duration = f'{duration} {t.getString(unit)}'
 
+        with self._tracer.span('gui.formatDates'):
+            broadcastedOn = utils.formatTimestamp(teaser.broadcastedOn, '%d.%m.%Y, %H:%M:%S')
+            availableTo = utils.formatTimestamp(teaser.availableTo, '%d.%m.%Y, %H:%M:%S')
+
+        plot = f'[B]{title}[/B]\n\n[B]{t.getString(DURATION)}[/B]: {duration}\n' \
+               f'[B]{t.getString(BROADCASTEDON)}[/B]: {broadcastedOn}\n' \
+               f'[B]{t.getString(AVAILABLETO)}[/B]: {availableTo} '
+
+        # Kodi sorts by 'Date' and only understands it as dd.mm.yyyy
         infoLabels = {
             'Title': title,
-            'Plot': str(plot),
-            'Date': teaser['broadcastedOn'],
-            'Aired': teaser['broadcastedOn'],
-            'Duration': teaser['duration']
+            'Plot': plot,
+            'Date': utils.formatTimestamp(teaser.broadcastedOn, '%d.%m.%Y'),
+            'Aired': teaser.broadcastedOn,
+            'Duration': teaser.duration
         }
 
-        self._guiManager.addDirectory(title=title, poster=teaser['poster'], _type='Video',
-                                      infoLabels=infoLabels, args=buildArgs('item', teaser['url']))
+        self._guiManager.addDirectory(title=title, poster=thumb or teaser.poster, _type='Video',
+                                      infoLabels=infoLabels, args=buildArgs('item', teaser.url))
         self._DirectoryBuilded = True
 
-    def addClip(self, teaser):
-        url = teaser['url']
-        self.setItemView(url, None)
+    def addClips(self, teasers):
+        # item pages are resolved concurrently, but added in teaser order
+        items = [item for item in self._fetchItems(teaser.url for teaser in teasers) if item is not None]
+        with self._tracer.span('images.preload'):
+            thumbs = self._getThumbs([item.poster for item in items])
+
+        for item in items:
+            with self._tracer.span('gui.addItem'):
+                self._addItem(item, thumbs.get(item.poster))
+
+    def _syncCatalog(self):
+        if self._catalog.isFresh():
+            return True
+
+        # resolved here, the sync may run on a thread of its own
+        fetchPage = partial(getCatalogPage, self._BASEURL, self._cache, self._transport)
+        fetchAll = partial(getCatalogTeasers, self._BASEURL, self._cache, self._transport, workers=self._MAX_WORKERS)
+
+        def sync():
+            with self._tracer.span('catalog.sync'):
+                self._catalog.sync(fetchPage, fetchAll)
+
+        if self._latencyBudget > 0 and self._catalog.hasContent():
+            return self._syncCatalogWithin(sync, self._latencyBudget)
+
+        try:
+            sync()
+        except Exception:
+            return False
+
+        return True
+
+    def _syncCatalogWithin(self, sync, budget):
+        # the catalog we have is shown once the budget is spent, the sync finishes in the background
+        import threading
+
+        done = threading.Event()
+        failed = []
+
+        def run():
+            try:
+                sync()
+            except Exception:
+                failed.append(True)
+            finally:
+                done.set()
+
+        threading.Thread(target=run).start()
+        if not done.wait(budget) or len(failed) > 0:
+            self._stale = True
+
+        return True
+
+    def _writeSnapshot(self):
+        # only a fresh catalog is written, a sync still running in the background writes nothing
+        if self._catalog.isFresh():
+            try:
+                with self._tracer.span('catalog.snapshot'):
+                    self._catalog.writeSnapshot(getSnapshotPath(self._addon, self._profile, self._namespace))
+            except Exception:
+                pass
+
+    def _getCatalogPage(self, tag):
+        pageNumber = int(tag.get('pageNumber', 0))
+        pageSize = int(tag.get('pageSize', self._PAGESIZE))
+
+        # a valid snapshot answers the page without opening the database
+        if self._snapshot is not None:
+            return self._snapshot.getPage(pageNumber, pageSize, self._POSTERWIDTH, self._teaserFilter)
+
+        if not self._syncCatalog() and not self._catalog.hasContent():
+            return None, None
+
+        self._writeSnapshot()
+        return self._catalog.getPage(pageNumber, pageSize, self._POSTERWIDTH, self._teaserFilter)
+
+    def _addTeasers(self, teasers):
+        if self._skip_itemPage:
+            self.addClips(teasers)
+        else:
+            self._addItemPages(list(teasers))
+
+    def _addItemPages(self, teasers, limit=None):
+        with self._tracer.span('images.preload'):
+            thumbs = self._getThumbs([teaser.poster for teaser in teasers], limit)
+
+        for teaser in teasers:
+            with self._tracer.span('gui.addItemPage'):
+                self.addItemPage(teaser, thumbs.get(teaser.poster))
+
+    def _addNextPage(self, pagination, method, url, _filter=None):
+        pageNumber = pagination.pageNumber
+        pageSize = pagination.pageSize
+        totalElements = pagination.totalElements
+
+        if totalElements > ((pageNumber + 1) * pageSize):
+            strPageNumber = str(pageNumber + 2)
+            tag = {
+                'pageNumber': pageNumber + 1,
+                'pageSize': self._PAGESIZE,
+                'posterWidth': self._POSTERWIDTH
+            }
+            if _filter is not None:
+                tag['filter'] = _filter
+
+            self._guiManager.addDirectory(title=f'Page {strPageNumber}',
+                                          args=buildArgs(method, url, json.dumps(tag)))
+            self._nextPage = method, url, tag
+
+    def _getPrefetchTeasers(self, cache, transport, catalog):
+        method, url, tag = self._nextPage
+        pageNumber = tag['pageNumber']
+        pageSize = tag['pageSize']
+        if method == 'search':
+            return catalog.search(tag['filter'], pageNumber, pageSize, self._POSTERWIDTH, self._teaserFilter)[1]
+
+        if url == self._BASEURL and catalog is not None and catalog.hasContent():
+            return catalog.getPage(pageNumber, pageSize, self._POSTERWIDTH, self._teaserFilter)[1]
+
+        teasers = openPage(url, tag, cache, transport).parse()
+        return teasers and [teaser for teaser in teasers if self._teaserFilter.isValid(teaser)]
+
+    def _prefetch(self, stop, cache, transport, catalog, streamCache, images):
+        # runs after endOfDirectory, the requests below only fill the cache for the next click
+        def fetchTeaser(teaser):
+            if stop.is_set():
+                return
+
+            item = self._fetchItem(teaser.url, cache, transport, streamCache)
+            if images is not None and not stop.is_set():
+                try:
+                    images.fetch(item.poster if skip_itemPage and item is not None else teaser.poster, transport)
+                except Exception:
+                    pass
+
+        skip_itemPage = self._skip_itemPage
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        try:
+            teasers = self._getPrefetchTeasers(cache, transport, catalog)
+        except Exception:
+            return
+
+        if teasers and not stop.is_set():
+            with ThreadPoolExecutor(max_workers=self._MAX_WORKERS) as executor:
+                list(executor.map(fetchTeaser, teasers))
+
+            if images is not None:
+                images.evict()
+
+    def prefetchNextPage(self):
+        if self._nextPage is None or self._addon.getSetting('prefetch_nextPage') != 'true' or self._cache is None:
+            return
+
+        import threading
+        import time
+
+        # the stores are resolved on this thread, the worker must not race for the cached properties; list pages
+        # come from the snapshot when there is one
+        catalog = self._snapshot
+        if catalog is None or self._nextPage[0] == 'search':
+            catalog = self._catalog
+
+        # Kodi waits for every thread of the invocation, daemon or not, so the requests of the worker have to be
+        # over within the budget as well
+        transport = DeadlineTransport(self._transport, time.monotonic() + self._PREFETCH_BUDGET)
+        stop = threading.Event()
+        worker = threading.Thread(target=self._prefetch, args=(stop, self._cache, transport, catalog,
+                                                               self._streamCache, self._images), daemon=True)
+        worker.start()
+        worker.join(self._PREFETCH_BUDGET)
+
+        # the worker starts no request once the deadline passed, the requests still running end with it
+        stop.set()
 
     def setListView(self, url, tag=None):
-        API = ARDMediathekAPI(url, tag)
-        pagination = API.getPagination()
-        teasers = API.getTeaser()
-
-        if teasers is not None:
-            for teaser in teasers:
-                # if self._isValidTeaser(teaser):
-                if True:
-                    {
-                        False: self.addItemPage,
-                        True: self.addClip
-                    }[self._skip_itemPage](teaser)
+        pagination, teasers = None, None
+        if url == self._BASEURL and (self._snapshot is not None or self._catalog is not None):
+            pagination, teasers = self._getCatalogPage(tag or {})
+
+        if teasers is None:
+            if self._latencyBudget > 0 and self._cache is not None:
+                page, stale = openPageWithin(url, tag, self._latencyBudget, self._cache, self._transport)
+                self._stale = self._stale or stale
+            else:
+                page = openPage(url, tag, self._cache, self._transport)
+            # the remote pages are filtered after the fact, a page may come up short then
+            self._addTeasers(teaser for teaser in page.iterTeasers() if self._teaserFilter.isValid(teaser))
+            pagination = page.pagination
+        else:
+            self._addTeasers(teasers)
 
         if pagination is not None:
-            pageNumber = int(pagination['pageNumber'])
-            pageSize = int(pagination['pageSize'])
-            totalElements = int(pagination['totalElements'])
-
-            if totalElements > ((pageNumber + 1) * pageSize):
-                strPageNumber = str(pageNumber + 2)
-                tag = {
-                    'pageNumber': pageNumber + 1,
-                    'pageSize': self._PAGESIZE,
-                    'posterWidth': self._POSTERWIDTH
-                }
-                self._guiManager.addDirectory(title=f'Page {strPageNumber}',
-                                              args=buildArgs('list', self._BASEURL, json.dumps(tag)))
+            self._addNextPage(pagination, 'list', url)
 
         self._DirectoryBuilded = True
 
+    def _setSearchResult(self, _filter, tag):
+        # the local index answers only while it is fresh, otherwise the remote search endpoint is asked
+        if self._catalog is not None and self._syncCatalog():
+            pagination, teasers = self._catalog.search(_filter, int(tag.get('pageNumber', 0)),
+                                                       int(tag.get('pageSize', self._PAGESIZE)), self._POSTERWIDTH,
+                                                       self._teaserFilter)
+            if teasers is not None:
+                self._addTeasers(teasers)
+                self._addNextPage(pagination, 'search', self._BASEURL, _filter)
+                self._DirectoryBuilded = True
+                return
+
+        url = self._SEARCHURL.replace('{searchstring}', f'{self._showname}|{_filter}')
+        self.setListView(url, tag)
+
     def setSearchView(self, url, tag=None):
+        if tag is not None and 'filter' in tag:
+            self._setSearchResult(tag.get('filter'), tag)
+            return
+
         search_guuid = 'not NONE'
         if tag is not None and 'search_guuid' in tag:
             search_guuid = tag.get('search_guuid')
@@ -212,8 +504,30 @@ class ArdMediathekClient:
             self._addon.setSetting('search_guuid', search_guuid)
             _filter = self._guiManager.getInput('', self._t.getString(SEARCHHEADER), False)
             if _filter != '':
-                url = self._SEARCHURL.replace('{searchstring}', f'{self._showname}|{_filter}')
-                self.setListView(url, tag)
+                self._setSearchResult(_filter, tag or {})
+
+    def setAllView(self, url, tag=None):
+        teasers = None
+        if self._snapshot is not None:
+            teasers = self._snapshot.getAll(self._POSTERWIDTH, self._teaserFilter)
+        elif self._catalog is not None and (self._syncCatalog() or self._catalog.hasContent()):
+            self._writeSnapshot()
+            teasers = self._catalog.getAll(self._POSTERWIDTH, self._teaserFilter)
+
+        if teasers is None:
+            teasers = getAllTeasers(self._BASEURL, self._POSTERWIDTH, self._cache, self._transport,
+                                    workers=self._MAX_WORKERS)
+            teasers = [teaser for teaser in teasers if self._teaserFilter.isValid(teaser)]
+
+        # resolving hundreds of item pages would defeat the listing, so skip_itemPage does not apply here; only
+        # the posters of the first screen are fetched up front
+        self._addItemPages(teasers, self._PAGESIZE)
+
+        for sortMethod in (GuiManager.SORT_METHOD_NONE, GuiManager.SORT_METHOD_DATE, GuiManager.SORT_METHOD_DURATION,
+                           GuiManager.SORT_METHOD_TITLE):
+            self._guiManager.addSortMethod(sortMethod)
+
+        self._DirectoryBuilded = True
 
     def setHomeView(self, url, tag=None):
         self._guiManager.addDirectory(title=self._t.getString(HOME),
@@ -221,12 +535,17 @@ class ArdMediathekClient:
 
         self._guiManager.addDirectory(title=self._t.getString(SEARCH),
                                       args=buildArgs('search', self._BASEURL, json.dumps(tag)))
+
+        self._guiManager.addDirectory(title=self._t.getString(ALLCONCERTS),
+                                      args=buildArgs('all', self._BASEURL))
         self._DirectoryBuilded = True
 
     def DoSome(self):
 
         args = get_query_args(sys.argv[2])
         if args is None or args.__len__() == 0:
+            import uuid
+
             tag = {
                 'pageNumber': 0,
                 'pageSize': self._PAGESIZE,
@@ -243,15 +562,37 @@ class ArdMediathekClient:
         if tag is not None and isinstance(tag, str):
             tag = json.loads(tag)
 
-        {
+        handler = {
             'home': self.setHomeView,
             'search': self.setSearchView,
             'list': self.setListView,
+            'all': self.setAllView,
             'item': self.setItemView
-        }[method](url, tag)
+        }[method]
+
+        with self._tracer.span(f'route.{method}'):
+            if self._addon.getSetting('profile_enabled') == 'true':
+                runProfiled(os.path.join(self._profile, 'profiles'), method, getKeepCount(self._addon),
+                            handler, url, tag)
+            else:
+                handler(url, tag)
 
         # self._guiManager.addSortMethod(GuiManager.SORT_METHOD_NONE)
         # self._guiManager.addSortMethod(GuiManager.SORT_METHOD_DATE)
 
+        if self._stale:
+            self._guiManager.notify(self._showname, self._t.getString(STALE))
+
         if self._DirectoryBuilded:
-            self._guiManager.endOfDirectory()
+            with self._tracer.span('gui.endOfDirectory'):
+                self._guiManager.endOfDirectory()
+
+            with self._tracer.span('prefetch.nextPage'):
+                self.prefetchNextPage()
+
+        cache = self.__dict__.get('_cache')
+        if cache is not None:
+            cache.flushStats()
+
+        if self._tracer.enabled:
+            self._reportTrace(method)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import calendar
+import re
+import sqlite3
+import threading
+import time
+
+from libs.catalog_snapshot import writeSnapshot
+from libs.records import Pagination, Teaser
+from libs.teaser_filter import isClip
+
+SYNC_PAGESIZE = 50
+MAX_AGE = 60 * 60
+# part of the file name, addons sharing the stores with another version keep a catalog of their own
+SCHEMA_VERSION = 4
+_COLUMNS = 'availableTo, broadcastedOn, duration, poster, title, url, synopsis'
+
+
+def _getTimestamp(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+
+def _getSeconds(timestamp):
+    return calendar.timegm(time.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S'))
+
+
+def _getMatchQuery(text):
+    # every word has to match, as prefix, so 'rock pal' finds 'Rockpalast'
+    words = re.findall(r'\w+', text)
+    if len(words) == 0:
+        return None
+
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _getCondition(teaserFilter):
+    # both filters are answered by the indexes, so counts and pages always describe the filtered set
+    condition, parameters = '', []
+    if teaserFilter is not None:
+        if teaserFilter.suppressClips:
+            condition += ' AND isClip = 0'
+        if teaserFilter.minDuration > 0:
+            condition += ' AND duration >= ?'
+            parameters.append(teaserFilter.minDuration)
+
+    return condition, parameters
+
+
+def _getTeaser(row, posterWidth):
+    teaser = Teaser._make(row)
+    return teaser._replace(poster=teaser.poster.replace('{width}', str(posterWidth)))
+
+
+class Catalog:
+
+    def __init__(self, path, namespace, maxAge=MAX_AGE):
+        self._namespace = namespace
+        self._maxAge = maxAge
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+
+        self._connection.execute('CREATE TABLE IF NOT EXISTS teasers ('
+                                 'namespace TEXT NOT NULL, '
+                                 'url TEXT NOT NULL, '
+                                 'broadcastedOn TEXT, '
+                                 'availableTo TEXT, '
+                                 'duration INTEGER, '
+                                 'poster TEXT, '
+                                 'title TEXT, '
+                                 'synopsis TEXT, '
+                                 'isClip INTEGER NOT NULL DEFAULT 0, '
+                                 'PRIMARY KEY (namespace, url))')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS teasers_broadcastedOn '
+                                 'ON teasers (namespace, broadcastedOn)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS teasers_isClip '
+                                 'ON teasers (namespace, isClip, broadcastedOn)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS teasers_duration '
+                                 'ON teasers (namespace, duration)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS sync_state ('
+                                 'namespace TEXT PRIMARY KEY, '
+                                 'synced REAL NOT NULL, '
+                                 'complete INTEGER NOT NULL)')
+
+        # not every SQLite build ships FTS5, searching falls back to the remote endpoint then
+        try:
+            self._connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS teasers_fts USING fts5('
+                                     'namespace UNINDEXED, url UNINDEXED, title, synopsis)')
+            self._hasFts = True
+        except sqlite3.OperationalError:
+            self._hasFts = False
+
+    def _getSyncState(self):
+        row = self._connection.execute('SELECT synced, complete FROM sync_state WHERE namespace = ?',
+                                       (self._namespace,)).fetchone()
+        if row is None:
+            return 0, False
+
+        return row[0], row[1] == 1
+
+    def hasContent(self):
+        with self._lock:
+            return self._getSyncState()[1]
+
+    def isFresh(self):
+        with self._lock:
+            synced, complete = self._getSyncState()
+            return complete and time.time() - synced < self._maxAge
+
+    def sync(self, fetchPage, fetchAll=None):
+        # fetchPage(pageNumber, pageSize) returns (pagination, teasers), teasers carry the raw '{width}' poster;
+        # fetchAll(pageSize) returns the teasers of all pages
+        with self._lock:
+            complete = self._getSyncState()[1]
+
+        if not complete and fetchAll is not None:
+            # nothing known to stop at, so there is no reason to walk the pages one after another
+            teasers = fetchAll(SYNC_PAGESIZE)
+            with self._lock:
+                self._store(teasers)
+            complete = True
+        else:
+            complete = self._syncPages(fetchPage, complete)
+
+        with self._lock:
+            self._purgeExpired()
+            self._connection.execute('INSERT OR REPLACE INTO sync_state (namespace, synced, complete) '
+                                     'VALUES (?, ?, ?)', (self._namespace, time.time(), 1 if complete else 0))
+
+    def _syncPages(self, fetchPage, complete):
+        pageNumber = 0
+        while True:
+            pagination, teasers = fetchPage(pageNumber, SYNC_PAGESIZE)
+            if not teasers:
+                return True
+
+            with self._lock:
+                known = self._getKnown([teaser.url for teaser in teasers])
+                self._store(teasers)
+
+            # the widget is ordered by broadcastedOn, everything behind a known teaser is known as well
+            if complete and len(known) > 0:
+                return True
+
+            if pagination is None or pagination.totalElements <= (pageNumber + 1) * SYNC_PAGESIZE:
+                return True
+
+            pageNumber += 1
+
+    def _getKnown(self, urls):
+        placeholders = ', '.join('?' * len(urls))
+        return [row[0] for row in self._connection.execute(f'SELECT url FROM teasers WHERE namespace = ? '
+                                                           f'AND url IN ({placeholders})',
+                                                           [self._namespace] + urls)]
+
+    def _store(self, teasers):
+        rows = [(self._namespace, teaser.url, teaser.broadcastedOn, teaser.availableTo,
+                 teaser.duration, teaser.poster, teaser.title, teaser.synopsis, 1 if isClip(teaser.title) else 0)
+                for teaser in teasers]
+
+        self._connection.execute('BEGIN')
+        self._connection.executemany('INSERT OR REPLACE INTO teasers (namespace, url, broadcastedOn, availableTo, '
+                                     'duration, poster, title, synopsis, isClip) '
+                                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        if self._hasFts:
+            self._connection.executemany('DELETE FROM teasers_fts WHERE namespace = ? AND url = ?',
+                                         [(row[0], row[1]) for row in rows])
+            self._connection.executemany('INSERT INTO teasers_fts (namespace, url, title, synopsis) '
+                                         'VALUES (?, ?, ?, ?)', [(row[0], row[1], row[6], row[7]) for row in rows])
+        self._connection.execute('COMMIT')
+
+    def _purgeExpired(self):
+        self._connection.execute('DELETE FROM teasers WHERE namespace = ? AND availableTo IS NOT NULL '
+                                 'AND availableTo < ?', (self._namespace, _getTimestamp(time.time())))
+        if self._hasFts:
+            self._connection.execute('DELETE FROM teasers_fts WHERE namespace = ? AND url NOT IN '
+                                     '(SELECT url FROM teasers WHERE namespace = ?)',
+                                     (self._namespace, self._namespace))
+
+    def getPage(self, pageNumber, pageSize, posterWidth, teaserFilter=None):
+        now = _getTimestamp(time.time())
+        condition, parameters = _getCondition(teaserFilter)
+        parameters = [self._namespace, now] + parameters
+        with self._lock:
+            totalElements = self._connection.execute(f'SELECT COUNT(*) FROM teasers WHERE namespace = ? '
+                                                     f'AND (availableTo IS NULL OR availableTo >= ?){condition}',
+                                                     parameters).fetchone()[0]
+            rows = self._connection.execute(f'SELECT {_COLUMNS} FROM teasers WHERE namespace = ? '
+                                            f'AND (availableTo IS NULL OR availableTo >= ?){condition} '
+                                            f'ORDER BY broadcastedOn DESC LIMIT ? OFFSET ?',
+                                            parameters + [pageSize, pageNumber * pageSize]).fetchall()
+
+        return Pagination(pageNumber, pageSize, totalElements), [_getTeaser(row, posterWidth) for row in rows]
+
+    def getAll(self, posterWidth, teaserFilter=None):
+        now = _getTimestamp(time.time())
+        condition, parameters = _getCondition(teaserFilter)
+        with self._lock:
+            rows = self._connection.execute(f'SELECT {_COLUMNS} FROM teasers WHERE namespace = ? '
+                                            f'AND (availableTo IS NULL OR availableTo >= ?){condition} '
+                                            f'ORDER BY broadcastedOn DESC',
+                                            [self._namespace, now] + parameters).fetchall()
+
+        return [_getTeaser(row, posterWidth) for row in rows]
+
+    def writeSnapshot(self, path):
+        # the snapshot is valid as long as the catalog is fresh and none of its teasers expired
+        now = _getTimestamp(time.time())
+        with self._lock:
+            synced = self._getSyncState()[0]
+            rows = self._connection.execute(f'SELECT {_COLUMNS}, isClip FROM teasers WHERE namespace = ? '
+                                            'AND (availableTo IS NULL OR availableTo >= ?) '
+                                            'ORDER BY broadcastedOn DESC', (self._namespace, now)).fetchall()
+
+        validUntil = synced + self._maxAge
+        for row in rows:
+            if row[0] is not None:
+                validUntil = min(validUntil, _getSeconds(row[0]))
+
+        writeSnapshot(path, rows, validUntil)
+
+    def search(self, text, pageNumber, pageSize, posterWidth, teaserFilter=None):
+        if not self._hasFts:
+            return None, None
+
+        query = _getMatchQuery(text)
+        if query is None:
+            return Pagination(pageNumber, pageSize, 0), []
+
+        now = _getTimestamp(time.time())
+        condition, parameters = _getCondition(teaserFilter)
+        condition = 'teasers_fts MATCH ? AND teasers_fts.namespace = ? ' \
+                    f'AND (availableTo IS NULL OR availableTo >= ?){condition}'
+        parameters = [query, self._namespace, now] + parameters
+        columns = ', '.join(f'teasers.{column}' for column in _COLUMNS.split(', '))
+        with self._lock:
+            totalElements = self._connection.execute(f'SELECT COUNT(*) FROM teasers_fts JOIN teasers '
+                                                     f'USING (namespace, url) WHERE {condition}',
+                                                     parameters).fetchone()[0]
+            # title matches weigh more than synopsis matches
+            rows = self._connection.execute(f'SELECT {columns} FROM teasers_fts JOIN teasers '
+                                            f'USING (namespace, url) WHERE {condition} '
+                                            f'ORDER BY bm25(teasers_fts, 0, 0, 10.0, 1.0), broadcastedOn DESC '
+                                            f'LIMIT ? OFFSET ?',
+                                            parameters + [pageSize, pageNumber * pageSize]).fetchall()
+
+        return Pagination(pageNumber, pageSize, totalElements), [_getTeaser(row, posterWidth) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import mmap
+import os
+import struct
+import time
+
+from libs.records import Pagination, Teaser
+
+# header, a table of fixed-width records ordered by broadcastedOn (newest first) and a pool of UTF-8 strings the
+# records point into; page N is a slice of the record table, nothing else is decoded
+_MAGIC = b'RPCS'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHdII')
+# offset and length of availableTo, broadcastedOn, poster, title, url and synopsis, then duration and isClip
+_RECORD = struct.Struct('<12IiB3x')
+_NONE = 0xFFFFFFFF
+
+
+def writeSnapshot(path, rows, validUntil):
+    # rows are (availableTo, broadcastedOn, duration, poster, title, url, synopsis, isClip), already ordered
+    pool = bytearray()
+    records = bytearray()
+    for row in rows:
+        fields = []
+        for value in (row[0], row[1], row[3], row[4], row[5], row[6]):
+            if value is None:
+                fields += (0, _NONE)
+            else:
+                data = value.encode('utf-8')
+                fields += (len(pool), len(data))
+                pool += data
+
+        records += _RECORD.pack(*fields, row[2] or 0, row[7])
+
+    # written next to the target and renamed, readers only ever map a complete snapshot
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, VERSION, 0, validUntil, len(rows), _HEADER.size + len(records)))
+        file.write(records)
+        file.write(pool)
+        file.flush()
+        os.fsync(file.fileno())
+
+    try:
+        os.replace(temporary, path)
+    except OSError:
+        # e.g. the old snapshot is still mapped by another invocation on Windows, the next sync writes it again
+        os.remove(temporary)
+
+
+def openSnapshot(path):
+    # None unless there is a complete snapshot of this version that is still valid
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) >= _HEADER.size:
+        magic, version, _, validUntil, count, poolOffset = _HEADER.unpack_from(data, 0)
+        if magic == _MAGIC and version == VERSION and time.time() < validUntil and \
+                poolOffset == _HEADER.size + count * _RECORD.size and poolOffset <= len(data):
+            return CatalogSnapshot(data, count, poolOffset)
+
+    data.close()
+    return None
+
+
+class CatalogSnapshot:
+
+    def __init__(self, data, count, poolOffset):
+        self._data = data
+        self._count = count
+        self._poolOffset = poolOffset
+
+    def _getString(self, offset, length):
+        if length == _NONE:
+            return None
+
+        start = self._poolOffset + offset
+        return self._data[start:start + length].decode('utf-8')
+
+    def _getTeaser(self, index, posterWidth):
+        fields = _RECORD.unpack_from(self._data, _HEADER.size + index * _RECORD.size)
+        availableTo, broadcastedOn, poster, title, url, synopsis = (self._getString(fields[i], fields[i + 1])
+                                                                    for i in range(0, 12, 2))
+        return Teaser(availableTo, broadcastedOn, fields[12], poster.replace('{width}', str(posterWidth)), title, url,
+                      synopsis)
+
+    def _getIndexes(self, teaserFilter):
+        if teaserFilter is None or (not teaserFilter.suppressClips and teaserFilter.minDuration <= 0):
+            return range(self._count)
+
+        # only the fixed-width part of the records is read, no string is decoded for the filter
+        table = memoryview(self._data)[_HEADER.size:self._poolOffset]
+        try:
+            return [index for index, fields in enumerate(_RECORD.iter_unpack(table))
+                    if not (teaserFilter.suppressClips and fields[13]) and fields[12] >= teaserFilter.minDuration]
+        finally:
+            table.release()
+
+    def hasContent(self):
+        return True
+
+    def getPage(self, pageNumber, pageSize, posterWidth, teaserFilter=None):
+        indexes = self._getIndexes(teaserFilter)
+        teasers = [self._getTeaser(index, posterWidth)
+                   for index in indexes[pageNumber * pageSize:(pageNumber + 1) * pageSize]]
+        return Pagination(pageNumber, pageSize, len(indexes)), teasers
+
+    def getAll(self, posterWidth, teaserFilter=None):
+        return [self._getTeaser(index, posterWidth) for index in self._getIndexes(teaserFilter)]
+
+    def close(self):
+        self._data.close()
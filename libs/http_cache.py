@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import sqlite3
+import threading
+import time
+
+
+LIST_TTL = 15 * 60
+ITEM_TTL = 24 * 60 * 60
+FLIGHT_LEASE = 30
+# part of the file name, addons sharing the stores with another version keep a cache of their own
+SCHEMA_VERSION = 2
+# reads only write the access time back once it is this old, LRU does not need it any finer
+ACCESS_RESOLUTION = 60
+
+
+def getTTL(url, listTTL=LIST_TTL):
+    # item pages (page-gateway/pages/<channel>/item/<id>) rarely change, list and search pages do
+    if '/item/' in url:
+        return ITEM_TTL
+
+    return listTTL
+
+
+class HttpCache:
+
+    def __init__(self, path, maxSize=25 * 1024 * 1024, listTTL=LIST_TTL):
+        self._maxSize = maxSize
+        self._listTTL = listTTL
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._owner = f'{os.getpid()}:{id(self)}'
+
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                 'url TEXT PRIMARY KEY, '
+                                 'content BLOB NOT NULL, '
+                                 'size INTEGER NOT NULL, '
+                                 'expires REAL NOT NULL, '
+                                 'accessed REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+        # the total size is kept up to date by triggers, so no write has to sum up the whole table
+        self._connection.execute('CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), '
+                                 'size INTEGER NOT NULL)')
+        self._connection.execute('INSERT OR IGNORE INTO usage (id, size) SELECT 0, TOTAL(size) FROM responses')
+        self._connection.execute('CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses '
+                                 'BEGIN UPDATE usage SET size = size + NEW.size; END')
+        self._connection.execute('CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses '
+                                 'BEGIN UPDATE usage SET size = size + NEW.size - OLD.size; END')
+        self._connection.execute('CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses '
+                                 'BEGIN UPDATE usage SET size = size - OLD.size; END')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS inflight ('
+                                 'url TEXT PRIMARY KEY, '
+                                 'owner TEXT NOT NULL, '
+                                 'expires REAL NOT NULL)')
+
+    def get(self, url, count=True):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT content, expires, accessed FROM responses WHERE url = ?',
+                                           (url,)).fetchone()
+
+            if row is None or row[1] < now:
+                if count:
+                    self._count('misses')
+                return None
+
+            if count:
+                self._count('hits')
+
+            # a plain read stays a read, every write is a transaction all invocations queue up for
+            if now - row[2] > ACCESS_RESOLUTION:
+                self._connection.execute('UPDATE responses SET accessed = ? WHERE url = ?', (now, url))
+            return row[0]
+
+    def getStale(self, url):
+        # an expired response that is still around, it has not been evicted yet
+        with self._lock:
+            row = self._connection.execute('SELECT content FROM responses WHERE url = ? AND expires < ?',
+                                           (url, time.time())).fetchone()
+
+        if row is not None:
+            return row[0]
+
+    def acquire(self, url, lease=FLIGHT_LEASE):
+        # single flight: the one invocation that gets the row downloads, the others wait for its result; a lease
+        # that ran out belongs to a download that died
+        now = time.time()
+        with self._lock:
+            self._connection.execute('DELETE FROM inflight WHERE url = ? AND expires < ?', (url, now))
+            cursor = self._connection.execute('INSERT OR IGNORE INTO inflight (url, owner, expires) VALUES (?, ?, ?)',
+                                              (url, self._owner, now + lease))
+            return cursor.rowcount == 1
+
+    def release(self, url):
+        with self._lock:
+            self._connection.execute('DELETE FROM inflight WHERE url = ? AND owner = ?', (url, self._owner))
+
+    def waitFor(self, url, timeout=FLIGHT_LEASE, interval=0.05):
+        # returns what the download in flight stored, None once it ended without a result or the wait timed out
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            now = time.time()
+            with self._lock:
+                row = self._connection.execute('SELECT content FROM responses WHERE url = ? AND expires >= ?',
+                                               (url, now)).fetchone()
+                if row is not None:
+                    self._count('coalesced')
+                    return row[0]
+
+                if self._connection.execute('SELECT 1 FROM inflight WHERE url = ? AND expires >= ?',
+                                            (url, now)).fetchone() is None:
+                    return None
+
+        return None
+
+    def set(self, url, content, ttl=None):
+        if ttl is None:
+            ttl = getTTL(url, self._listTTL)
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute('INSERT INTO responses (url, content, size, expires, accessed) '
+                                     'VALUES (?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET content = excluded.content, '
+                                     'size = excluded.size, expires = excluded.expires, accessed = excluded.accessed',
+                                     (url, sqlite3.Binary(content), len(content), now + ttl, now))
+            self._evict()
+
+    def flushStats(self):
+        # the counters of an invocation are written in one go, not with every lookup
+        with self._lock:
+            self._flushStats()
+
+    def _flushStats(self):
+        counts = [(name, value) for name, value in self._counts.items() if value > 0]
+        if len(counts) == 0:
+            return
+
+        self._connection.executemany('INSERT INTO stats (name, value) VALUES (?, ?) '
+                                     'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value', counts)
+        self._counts = {}
+
+    def getStats(self):
+        with self._lock:
+            self._flushStats()
+            stats = dict(self._connection.execute('SELECT name, value FROM stats').fetchall())
+            entries = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            size = self._connection.execute('SELECT size FROM usage').fetchone()[0]
+
+        return {
+            'hits': stats.get('hits', 0),
+            'misses': stats.get('misses', 0),
+            'coalesced': stats.get('coalesced', 0),
+            'entries': entries,
+            'size': int(size)
+        }
+
+    def close(self):
+        with self._lock:
+            self._flushStats()
+            self._connection.close()
+
+    def _count(self, name):
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def _evict(self):
+        size = self._connection.execute('SELECT size FROM usage').fetchone()[0]
+        if size <= self._maxSize:
+            return
+
+        # drop the least recently used entries until the cache fits again
+        for url, entrySize in self._connection.execute('SELECT url, size FROM responses '
+                                                        'ORDER BY accessed').fetchall():
+            self._connection.execute('DELETE FROM responses WHERE url = ?', (url,))
+            size -= entrySize
+            if size <= self._maxSize:
+                break
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import random
+import threading
+import time
+import urllib.parse
+
+from libs.request_scheduler import MAX_PAUSE, MAX_WAIT, RequestScheduler
+
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+# only a Retry-After the scheduler pauses the host for is waited out
+MAX_RETRY_AFTER = MAX_PAUSE
+_defaultTransport = None
+
+
+def getDefaultTransport():
+    global _defaultTransport
+    if _defaultTransport is None:
+        _defaultTransport = HttpTransport()
+
+    return _defaultTransport
+
+
+def getRetryAfter(response):
+    # Retry-After is either a number of seconds or an HTTP date
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpError(Exception):
+
+    def __init__(self, url, status):
+        Exception.__init__(self, f'HTTP {status} for {url}')
+        self.url = url
+        self.status = status
+
+
+class HttpTransport:
+
+    def __init__(self, connectTimeout=5, readTimeout=15, retries=2, backoff=0.5, poolSize=10):
+        # requests is the most expensive import of the addon, routes without network access never load it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._timeout = (connectTimeout, readTimeout)
+        self._retries = retries
+        self._backoff = backoff
+        self._lock = threading.Lock()
+        # running totals, a transport kept for a whole Kodi session must not grow with every request
+        self._summary = {
+            'requests': 0,
+            'errors': 0,
+            'bytes': 0,
+            'latency': 0.0,
+            'maxLatency': 0.0
+        }
+        self._poolSize = poolSize
+        self._schedulers = {}
+
+        # one pool per host (api.ardmediathek.de, page.ardmediathek.de), kept alive for the whole invocation
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=poolSize)
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+
+    def _getScheduler(self, url):
+        # every host is paced on its own, the image service does not throttle the page-gateway
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            scheduler = self._schedulers.get(host)
+            if scheduler is None:
+                scheduler = self._schedulers[host] = RequestScheduler(maxConcurrency=self._poolSize)
+
+            return scheduler
+
+    def _getTimeout(self, url, deadline):
+        # a deadline caps the waits of a request at the time that is left, none starts once it passed
+        if deadline is None:
+            return self._timeout
+
+        import requests
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f'deadline passed for {url}')
+
+        return min(self._timeout[0], remaining), min(self._timeout[1], remaining)
+
+    def _request(self, url, stream, deadline=None):
+        import requests
+
+        scheduler = self._getScheduler(url)
+        attempt = 0
+        while True:
+            # the scheduler paces every attempt, a slot is held until the response headers arrived and given back
+            # on every way out, whatever requests raises
+            scheduler.acquire(MAX_WAIT if deadline is None else min(MAX_WAIT, max(0, deadline - time.monotonic())))
+            start = time.monotonic()
+            status, retryAfter = None, None
+            try:
+                timeout = self._getTimeout(url, deadline)
+                response = self._session.get(url, timeout=timeout, stream=stream)
+                status = response.status_code
+                retryAfter = getRetryAfter(response)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(url, None, 0, start)
+                if attempt >= self._retries:
+                    raise
+            else:
+                if status not in _RETRY_STATUS or attempt >= self._retries or \
+                        (retryAfter is not None and retryAfter > MAX_RETRY_AFTER):
+                    return response, start
+
+                self._record(url, status, len(response.content), start)
+            finally:
+                scheduler.release(status, time.monotonic() - start, retryAfter)
+
+            attempt += 1
+            time.sleep(self._getBackoff(attempt))
+
+    def get(self, url, deadline=None):
+        response, start = self._request(url, False, deadline)
+        self._record(url, response.status_code, len(response.content), start)
+        return response
+
+    def iterContent(self, url, chunkSize=64 * 1024, deadline=None):
+        # retries only happen before the first byte, once the body is streaming errors are passed on
+        response, start = self._request(url, True, deadline)
+        if response.status_code >= 400:
+            # error bodies are no pages, they never reach the parser or the cache
+            response.close()
+            self._record(url, response.status_code, 0, start)
+            raise HttpError(url, response.status_code)
+
+        size = 0
+        try:
+            for chunk in response.iter_content(chunkSize):
+                size += len(chunk)
+                yield response.status_code, chunk
+                self._getTimeout(url, deadline)
+        finally:
+            response.close()
+            self._record(url, response.status_code, size, start)
+
+    def _getBackoff(self, attempt):
+        # full jitter, so concurrent retries don't hit the server in lockstep
+        return random.uniform(0, self._backoff * (2 ** (attempt - 1)))
+
+    def _record(self, url, status, size, start):
+        latency = time.monotonic() - start
+        with self._lock:
+            summary = self._summary
+            summary['requests'] += 1
+            if status is None or status >= 400:
+                summary['errors'] += 1
+            summary['bytes'] += size
+            summary['latency'] += latency
+            summary['maxLatency'] = max(summary['maxLatency'], latency)
+
+    def getSummary(self):
+        with self._lock:
+            return dict(self._summary)
+
+    def close(self):
+        self._session.close()
+
+
+class DeadlineTransport:
+    # the requests of a job that has to be over at a fixed time, on the connections of the transport it wraps
+
+    def __init__(self, transport, deadline):
+        self._transport = transport
+        self._deadline = deadline
+
+    def get(self, url):
+        return self._transport.get(url, self._deadline)
+
+    def iterContent(self, url, chunkSize=64 * 1024):
+        return self._transport.iterContent(url, chunkSize, self._deadline)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import os
+
+
+class ImageCache:
+
+    def __init__(self, directory, maxSize=50 * 1024 * 1024):
+        self._directory = directory
+        self._maxSize = maxSize
+        os.makedirs(self._directory, exist_ok=True)
+
+    def _getFilename(self, url):
+        return os.path.join(self._directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')
+
+    def getPath(self, url):
+        # the modification time doubles as last access, it orders the eviction
+        filename = self._getFilename(url)
+        try:
+            os.utime(filename)
+        except OSError:
+            return None
+
+        return filename
+
+    def fetch(self, url, transport):
+        filename = self.getPath(url)
+        if filename is not None:
+            return filename
+
+        response = transport.get(url)
+        if response.status_code != 200:
+            return None
+
+        filename = self._getFilename(url)
+        temp = f'{filename}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(response.content)
+        os.replace(temp, filename)
+
+        return filename
+
+    def evict(self):
+        entries = []
+        size = 0
+        with os.scandir(self._directory) as directory:
+            for entry in directory:
+                if entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    size += stat.st_size
+
+        if size <= self._maxSize:
+            return
+
+        # drop the least recently used posters until the cache fits again
+        entries.sort()
+        for _, entrySize, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            size -= entrySize
+            if size <= self._maxSize:
+                break
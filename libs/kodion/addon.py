@@ -35,7 +35,23 @@ class Addon(xbmcaddon.Addon):
                 'suppress_MusicClips': 'true',
                 'suppress_duration': '2',
                 'page_itemCount': '5',
-                'skip_itemPage': 'true'
+                'skip_itemPage': 'true',
+                'cache_enabled': 'true',
+                'cache_size': '1',
+                'catalog_enabled': 'true',
+                'prefetch_nextPage': 'true',
+                'poster_preload': 'true',
+                'image_cache_size': '1',
+                'latency_budget': '0',
+                'shared_cache': 'false',
+                'prefetch_enabled': 'false',
+                'prefetch_interval': '1',
+                'prefetch_pages': '0',
+                'prefetch_budget': '1',
+                'trace_enabled': 'true',
+                'trace_file': 'false',
+                'profile_enabled': 'false',
+                'profile_keep': '1'
             }[name]
 
     def setSetting(self, name, value):
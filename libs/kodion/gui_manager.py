@@ -31,6 +31,19 @@ def getScreenWidth():
     return xbmcgui.getScreenWidth()
 
 
+# the widths asked from the image service, similar layouts share the cached posters
+POSTER_WIDTHS = (320, 480, 640, 960, 1280)
+
+
+def getPosterWidth(screenWidth):
+    width = screenWidth / 3
+    for posterWidth in POSTER_WIDTHS:
+        if posterWidth >= width:
+            return posterWidth
+
+    return POSTER_WIDTHS[-1]
+
+
 class GuiManager:
 
     SORT_METHOD_NONE = xbmcplugin.SORT_METHOD_NONE
@@ -38,12 +51,21 @@ class GuiManager:
     SORT_METHOD_DURATION = xbmcplugin.SORT_METHOD_DURATION
     SORT_METHOD_TITLE = xbmcplugin.SORT_METHOD_TITLE
 
-    def __init__(self, argv, addon_id, default_image_url, fanart):
+    def __init__(self, argv, addon_id, default_image_url, fanart, batch=False):
         self._argv = int(argv)
         self._debug = os.getenv('kodi_debug') is not None
         self._addon_id = addon_id
         self._default_image_url = default_image_url
         self._fanart = fanart
+        self._batch = batch
+        self._items = []
+
+        # shared by every entry of the directory, ListItem copies them
+        self._defaultArt = {'thumb': self._default_image_url}
+        self._directoryProperty = {}
+        if self._fanart is not None:
+            self._directoryProperty['Fanart_Image'] = self._fanart
+        self._itemProperty = dict(self._directoryProperty, IsPlayable='true')
 
         xbmcplugin.setPluginFanart(self._argv, self._fanart)
 
@@ -51,7 +73,7 @@ class GuiManager:
         xbmcplugin.setContent(self._argv, content)
 
     def __setEntity(self, title, url, art, _property, _type, infolabels, isFolder):
-        li = xbmcgui.ListItem(str(title))
+        li = xbmcgui.ListItem(str(title), offscreen=True)
         if art is not None:
             li.setArt(art)
 
@@ -62,49 +84,47 @@ class GuiManager:
         if _type is not None and infolabels is not None:
             li.setInfo(type=_type, infoLabels=infolabels)
 
-        xbmcplugin.addDirectoryItem(handle=self._argv, url=url, listitem=li, isFolder=isFolder)
-
-    def addDirectory(self, title, poster=None, fanArt=None, _type=None, infoLabels=None, args=None):
-        art = {}
-        _property = {}
+        if self._batch:
+            self._items.append((url, li, isFolder))
+        else:
+            xbmcplugin.addDirectoryItem(handle=self._argv, url=url, listitem=li, isFolder=isFolder)
 
+    def __getArt(self, poster):
         if poster is not None:
-            art['thumb'] = poster
-        else:
-            art['thumb'] = self._default_image_url
+            return {'thumb': poster}
 
+        return self._defaultArt
+
+    def __getProperty(self, fanArt, default):
         if fanArt is not None:
-            _property['Fanart_Image'] = fanArt
-        elif self._fanart is not None:
-            _property['Fanart_Image'] = self._fanart
+            return dict(default, Fanart_Image=fanArt)
+
+        return default
 
+    def addDirectory(self, title, poster=None, fanArt=None, _type=None, infoLabels=None, args=None):
         url = 'plugin://' + self._addon_id + '/?' + urllib.parse.urlencode(args)
-        self.__setEntity(title, url, art, _property, _type, infoLabels, True)
+        self.__setEntity(title, url, self.__getArt(poster), self.__getProperty(fanArt, self._directoryProperty),
+                         _type, infoLabels, True)
 
     def addItem(self, title, url, poster=None, fanArt=None, _type=None, infoLabels=None):
-        art = {}
-        _property = {}
-
-        if poster is not None:
-            art['thumb'] = poster
-        else:
-            art['thumb'] = self._default_image_url
-
-        if fanArt is not None:
-            _property['Fanart_Image'] = fanArt
-        elif self._fanart is not None:
-            _property['Fanart_Image'] = self._fanart
+        self.__setEntity(title, url, self.__getArt(poster), self.__getProperty(fanArt, self._itemProperty),
+                         _type, infoLabels, False)
 
-        _property['IsPlayable'] = 'true'
-
-        self.__setEntity(title, url, art, _property, _type, infoLabels, False)
+    def flush(self):
+        if len(self._items) > 0:
+            xbmcplugin.addDirectoryItems(self._argv, self._items, len(self._items))
+            self._items = []
 
     def addSortMethod(self, sortMethod):
         xbmcplugin.addSortMethod(self._argv, sortMethod)
 
     def endOfDirectory(self):
+        self.flush()
         xbmcplugin.endOfDirectory(self._argv)
 
+    def notify(self, heading, message):
+        xbmcgui.Dialog().notification(heading, message, xbmcgui.NOTIFICATION_INFO, 5000, False)
+
     def getInput(self,  default=None, heading=None, hidden=None, debugDefault=None):
         if not self._debug:
             kb = xbmc.Keyboard(default, heading, hidden)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import codecs
+import json
+import re
+
+from libs.records import Item, Pagination, StreamVariant, Teaser
+from libs.tracing import getTracer
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# what a number cut off at the end of a chunk may leave behind, e.g. the '.' of '12.' or the 'e-' of '1e-5'
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_decoder = json.JSONDecoder()
+
+
+def getPagination(pagination):
+    if pagination is not None:
+        return Pagination(int(pagination['pageNumber']), int(pagination['pageSize']),
+                          int(pagination['totalElements']))
+
+
+def getTeaser(teaser, posterWidth):
+    return Teaser(teaser['availableTo'],
+                  teaser['broadcastedOn'],
+                  teaser['duration'],
+                  teaser['images']['aspect16x9']['src'].replace('{width}', str(posterWidth)),
+                  teaser['longTitle'],
+                  teaser['links']['target']['href'],
+                  teaser.get('synopsis'))
+
+
+def getItem(title, widgets, posterWidth, quality):
+    item = widgets[0]
+    poster = item['image']['src'].replace('{width}', str(posterWidth))
+    embedded = item['mediaCollection']['embedded']
+    streams = tuple(StreamVariant(stream['_quality'], stream['_stream'])
+                    for stream in embedded['_mediaArray'][0]['_mediaStreamArray'])
+    url = getItemUrl(streams, quality)
+
+    if url is not None:
+        return Item(title,
+                    item['availableTo'],
+                    item['broadcastedOn'],
+                    item['synopsis'],
+                    poster,
+                    url,
+                    embedded['_duration'],
+                    streams)
+
+
+def getItemUrl(streams, quality):
+    # the configured quality if the item has it, otherwise the nearest one, the lower one on a tie
+    if quality is None:
+        return None
+
+    nearest = None
+    for stream in streams:
+        if stream.quality == quality:
+            return stream.url
+
+        if isinstance(stream.quality, int):
+            distance = (abs(stream.quality - quality), stream.quality > quality)
+            if nearest is None or distance < nearest[0]:
+                nearest = distance, stream.url
+
+    if nearest is not None:
+        return nearest[1]
+
+    # only qualities like 'auto' left
+    if len(streams) > 0:
+        return streams[0].url
+
+
+class _Reader:
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+
+        # drop everything already consumed, the buffer only ever holds the value being decoded
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'expected {char!r} at position {self._pos}')
+
+        self._pos += 1
+
+    def finish(self):
+        # let the chunk source run to its end, e.g. so it can store the response in the cache
+        for _ in self._chunks:
+            pass
+
+    def readValue(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # a number at the end of the buffer may continue in the next chunk, '12.' decodes as 12 followed by '.'
+            if _NUMBER_TAIL.fullmatch(self._buffer, end) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+
+class PageParser:
+
+    def __init__(self, chunks, posterWidth=480, quality=None):
+        self._reader = _Reader(chunks)
+        self._posterWidth = posterWidth
+        self._quality = quality
+        self.pagination = None
+        self.item = None
+        self.hasTeasers = False
+
+    def iterTeasers(self):
+        # walks the top level object and yields each teaser as soon as it is complete; teasers are decoded
+        # one at a time, the full response tree is never built
+        reader = self._reader
+        tracer = getTracer()
+        title = None
+        widgets = None
+
+        reader.expect('{')
+        while reader.peek() != '}':
+            key = reader.readValue()
+            reader.expect(':')
+
+            if key == 'teasers' and reader.peek() == '[':
+                self.hasTeasers = True
+                reader.expect('[')
+                while reader.peek() != ']':
+                    with tracer.span('parse.teaser'):
+                        teaser = getTeaser(reader.readValue(), self._posterWidth)
+                    yield teaser
+                    if reader.peek() == ',':
+                        reader.expect(',')
+                reader.expect(']')
+            else:
+                with tracer.span('parse.value'):
+                    value = reader.readValue()
+                if key == 'pagination':
+                    self.pagination = getPagination(value)
+                elif key == 'title':
+                    title = value
+                elif key == 'widgets':
+                    widgets = value
+
+            if reader.peek() == ',':
+                reader.expect(',')
+
+        reader.expect('}')
+        reader.finish()
+
+        if widgets:
+            with tracer.span('parse.item'):
+                self.item = getItem(title, widgets, self._posterWidth, self._quality)
+
+    def parse(self):
+        teasers = list(self.iterTeasers())
+        return teasers if self.hasTeasers else None
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+from functools import partial
+
+import xbmc
+
+from libs.ardmediathek_api import ARDMediathekAPI, getAssetUrl, getCatalogPage, resolveItem
+from libs.http_transport import HttpTransport
+from libs.kodion.addon import Addon
+from libs.kodion.gui_manager import getPosterWidth, getScreenWidth
+from libs.stores import getNamespace, getPageSize, getProfilePath, getRefreshInterval, getSnapshotPath, openCache, \
+    openCatalog, openImageCache, openStreamCache
+from libs.teaser_filter import getTeaserFilter
+
+
+class _Paused(Exception):
+    pass
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _BudgetTransport:
+
+    def __init__(self, transport, budget, isPaused):
+        self._transport = transport
+        self._budget = budget
+        self._isPaused = isPaused
+        self.used = 0
+
+    def _take(self):
+        if self._isPaused():
+            raise _Paused()
+
+        if self.used >= self._budget:
+            raise _BudgetExhausted()
+
+        self.used += 1
+
+    def get(self, url):
+        self._take()
+        return self._transport.get(url)
+
+    def iterContent(self, url):
+        self._take()
+        return self._transport.iterContent(url)
+
+
+class PrefetchScheduler:
+
+    def __init__(self, interval, startDelay=60, retryDelay=60, clock=time.time):
+        self._interval = interval
+        self._retryDelay = retryDelay
+        self._clock = clock
+        self._nextRun = clock() + startDelay
+
+    def setInterval(self, interval):
+        self._interval = interval
+
+    def isDue(self):
+        return self._clock() >= self._nextRun
+
+    def markDone(self):
+        self._nextRun = self._clock() + self._interval
+
+    def markInterrupted(self):
+        self._nextRun = self._clock() + self._retryDelay
+
+
+class PrefetchService:
+
+    _POLL_INTERVAL = 10
+
+    def __init__(self, addon_id, mediathek_id, channel, monitor=None, player=None, clock=time.time):
+        self._addon_id = addon_id
+        self._namespace = getNamespace(channel, mediathek_id)
+        self._BASEURL = getAssetUrl(channel, mediathek_id)
+        self._monitor = monitor if monitor is not None else xbmc.Monitor()
+        self._player = player if player is not None else xbmc.Player()
+        self._scheduler = PrefetchScheduler(60 * 60, clock=clock)
+        self._transport = HttpTransport()
+
+    def run(self):
+        while not self._monitor.abortRequested():
+            if self._scheduler.isDue():
+                self.runOnce()
+
+            if self._monitor.waitForAbort(self._POLL_INTERVAL):
+                break
+
+    def _isPaused(self):
+        return self._player.isPlaying() or self._monitor.abortRequested()
+
+    def runOnce(self):
+        addon = Addon(self._addon_id)
+        self._scheduler.setInterval(getRefreshInterval(addon))
+
+        if addon.getSetting('prefetch_enabled') != 'true':
+            self._scheduler.markDone()
+            return
+
+        if self._isPaused():
+            self._scheduler.markInterrupted()
+            return
+
+        budget = {
+            '0': 25,
+            '1': 50,
+            '2': 100,
+            '3': 200
+        }[addon.getSetting('prefetch_budget')]
+        transport = _BudgetTransport(self._transport, budget, self._isPaused)
+
+        try:
+            self.refresh(addon, transport)
+            self._scheduler.markDone()
+        except _BudgetExhausted:
+            self._scheduler.markDone()
+        except _Paused:
+            self._scheduler.markInterrupted()
+        except Exception as e:
+            xbmc.log(f'[{self._addon_id}] prefetch failed: {e}', xbmc.LOGWARNING)
+            self._scheduler.markDone()
+
+    def refresh(self, addon, transport):
+        profile = getProfilePath(addon)
+        cache = openCache(addon, profile)
+        catalog = openCatalog(addon, profile, self._namespace)
+        images = openImageCache(addon, profile)
+        streamCache = openStreamCache(addon, profile)
+
+        pageSize = getPageSize(addon)
+        pages = {
+            '0': 1,
+            '1': 2,
+            '2': 3,
+            '3': 5
+        }[addon.getSetting('prefetch_pages')]
+        posterWidth = getPosterWidth(getScreenWidth())
+        teaserFilter = getTeaserFilter(addon)
+        itemTag = {
+            'posterWidth': posterWidth,
+            'quality': int(addon.getSetting('quality'))
+        }
+
+        try:
+            teasers = []
+            # the stores keep what a refresh downloads until the next one is due, so the refresh itself never takes
+            # the cached pages for the current ones
+            if catalog is not None:
+                catalog.sync(partial(getCatalogPage, self._BASEURL, cache, transport, refresh=True))
+                catalog.writeSnapshot(getSnapshotPath(addon, profile, self._namespace))
+
+                for pageNumber in range(pages):
+                    teasers += catalog.getPage(pageNumber, pageSize, posterWidth, teaserFilter)[1]
+
+            else:
+                for pageNumber in range(pages):
+                    tag = {
+                        'pageNumber': pageNumber,
+                        'pageSize': pageSize,
+                        'posterWidth': posterWidth
+                    }
+                    API = ARDMediathekAPI(self._BASEURL, tag, cache, transport, refresh=True)
+                    teasers += [teaser for teaser in API.getTeaser() or [] if teaserFilter.isValid(teaser)]
+
+                    pagination = API.getPagination()
+                    if pagination is None or pagination.totalElements <= (pageNumber + 1) * pageSize:
+                        break
+
+            # the newest teasers first, so a small budget still covers the top of the list
+            for teaser in teasers:
+                if cache is not None:
+                    resolveItem(teaser.url, itemTag, cache, transport, streamCache)
+                if images is not None:
+                    images.fetch(teaser.poster, transport)
+
+            if images is not None:
+                images.evict()
+
+        finally:
+            for store in (cache, catalog, streamCache):
+                if store is not None:
+                    store.close()
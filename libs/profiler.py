@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import time
+
+
+def getKeepCount(addon):
+    return {
+        '0': 5,
+        '1': 10,
+        '2': 20,
+        '3': 50
+    }[addon.getSetting('profile_keep')]
+
+
+def _getFilename(route):
+    now = time.time()
+    return f'{route}-{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}-{int(now * 1000) % 1000:03d}.pstats'
+
+
+def _rotate(directory, keep):
+    # concurrent invocations rotate the same directory, a file may be gone by the time it is looked at
+    files = []
+    for name in os.listdir(directory):
+        if name.endswith('.pstats'):
+            path = os.path.join(directory, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+
+    files.sort()
+    for _, path in files[:max(0, len(files) - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def runProfiled(directory, route, keep, function, *args):
+    # the .pstats files open with pstats or snakeviz, e.g. python -m pstats list-20220101-201500-123.pstats
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args)
+    finally:
+        # a profile that can't be written must not replace the result or the exception of the route
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, _getFilename(route)))
+            _rotate(directory, keep)
+        except OSError as e:
+            import xbmc
+            xbmc.log(f'profile of {route} not written: {e}', xbmc.LOGWARNING)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+from collections import namedtuple
+
+# namedtuples have no per-instance __dict__ and are immutable; they serialize as plain JSON arrays
+
+Pagination = namedtuple('Pagination', 'pageNumber pageSize totalElements')
+StreamVariant = namedtuple('StreamVariant', 'quality url')
+Teaser = namedtuple('Teaser', 'availableTo broadcastedOn duration poster title url synopsis')
+Item = namedtuple('Item', 'title availableTo broadcastedOn plot poster url duration streams')
+
+
+def dumps(record):
+    return json.dumps(record, separators=(',', ':'))
+
+
+def loadItem(data):
+    item = Item._make(json.loads(data))
+    return item._replace(streams=tuple(StreamVariant._make(stream) for stream in item.streams))
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+import time
+
+_THROTTLE_STATUS = (429, 500, 502, 503, 504)
+# the longest Retry-After the host is paused for, longer ones fail the request instead of stalling every other one
+MAX_PAUSE = 30
+MAX_WAIT = MAX_PAUSE
+
+
+class HostPaused(Exception):
+
+    def __init__(self, remaining):
+        Exception.__init__(self, f'host paused for another {remaining:.1f} s')
+        self.remaining = remaining
+
+
+class RequestScheduler:
+
+    # token bucket for the request rate, AIMD for the number of requests in flight: the limit grows by one per
+    # round of healthy responses and halves on throttling, errors or a latency spike, at most once per round trip
+
+    def __init__(self, rate=40.0, burst=30, concurrency=4, minConcurrency=1, maxConcurrency=8):
+        self._rate = rate
+        self._burst = burst
+        self._minConcurrency = minConcurrency
+        self._maxConcurrency = maxConcurrency
+        self._condition = threading.Condition()
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._active = 0
+        self._pausedUntil = 0.0
+        self._latency = None
+        self._lastDecrease = 0.0
+        self.limit = float(concurrency)
+
+    def _refill(self, now):
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, maxWait=MAX_WAIT):
+        # a request that waited maxWait goes out anyway, a slot that was never given back must not block the host;
+        # a pause that outlasts maxWait fails right away
+        deadline = time.monotonic() + maxWait
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if self._pausedUntil > deadline:
+                    raise HostPaused(self._pausedUntil - now)
+
+                if now >= deadline:
+                    self._tokens = max(0.0, self._tokens - 1)
+                    self._active += 1
+                    return
+
+                if now < self._pausedUntil:
+                    timeout = self._pausedUntil - now
+                elif self._active >= int(self.limit):
+                    timeout = deadline - now
+                elif self._tokens < 1:
+                    timeout = (1 - self._tokens) / self._rate
+                else:
+                    self._tokens -= 1
+                    self._active += 1
+                    return
+
+                self._condition.wait(min(timeout, deadline - now))
+
+    def release(self, status, latency, retryAfter=None):
+        # status is None for a request that failed without a response
+        with self._condition:
+            self._active = max(0, self._active - 1)
+            now = time.monotonic()
+
+            if retryAfter is not None and retryAfter <= MAX_PAUSE:
+                self._pausedUntil = max(self._pausedUntil, now + retryAfter)
+
+            throttled = status is None or status in _THROTTLE_STATUS
+            spike = self._latency is not None and latency > max(2 * self._latency, 0.5)
+            if throttled or spike:
+                if now - self._lastDecrease > (self._latency or 1.0):
+                    self.limit = max(self._minConcurrency, self.limit / 2)
+                    self._lastDecrease = now
+            else:
+                self.limit = min(self._maxConcurrency, self.limit + 1 / self.limit)
+
+            if not throttled:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+
+            self._condition.notify_all()
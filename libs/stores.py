@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import re
+
+from libs.kodion.utils import Utils as kodionUtils
+
+# the stores pull in sqlite3, they are imported on first use so routes that never open them skip it
+
+# sibling addons built on ArdMediathekClient can keep their stores in one place, the responses, streams and posters
+# of an item are then stored once no matter under how many shows it appears
+SHARED_PROFILE = 'special://profile/addon_data/ardmediathek.shared/'
+# with the background refresh on, the lists are kept until the next refresh is due plus the time it may take to run
+REFRESH_MARGIN = 15 * 60
+
+
+def getPageSize(addon):
+    return {
+        '0': 5,
+        '1': 10,
+        '2': 15,
+        '3': 20,
+        '4': 25,
+        '5': 30
+    }[addon.getSetting('page_itemCount')]
+
+
+def getRefreshInterval(addon):
+    return {
+        '0': 30,
+        '1': 60,
+        '2': 120,
+        '3': 240
+    }[addon.getSetting('prefetch_interval')] * 60
+
+
+def _getMaxAge(addon, maxAge):
+    # opening the addon between two refreshes of the service stays a read of the stores
+    if addon.getSetting('prefetch_enabled') != 'true':
+        return maxAge
+
+    return max(maxAge, getRefreshInterval(addon) + REFRESH_MARGIN)
+
+
+def getProfilePath(addon):
+    profile = kodionUtils.translatePath(addon.getAddonInfo('profile'))
+    os.makedirs(profile, exist_ok=True)
+    return profile
+
+
+def getNamespace(channel, mediathek_id):
+    # the key of a show in the stores, unique across the addons sharing them
+    return f'{channel}/{mediathek_id}'
+
+
+def getStorePath(addon, profile):
+    if addon.getSetting('shared_cache') != 'true':
+        return profile
+
+    path = kodionUtils.translatePath(SHARED_PROFILE)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _getSize(addon, sizes, setting):
+    # the shared stores have one limit, the largest one offered, or every addon would evict them down to its own
+    if addon.getSetting('shared_cache') == 'true':
+        return max(sizes.values()) * 1024 * 1024
+
+    return sizes[addon.getSetting(setting)] * 1024 * 1024
+
+
+def openCache(addon, profile):
+    if addon.getSetting('cache_enabled') != 'true':
+        return None
+
+    from libs.http_cache import LIST_TTL, SCHEMA_VERSION, HttpCache
+    return HttpCache(os.path.join(getStorePath(addon, profile), f'cache-v{SCHEMA_VERSION}.db'), _getSize(addon, {
+        '0': 10,
+        '1': 25,
+        '2': 50,
+        '3': 100
+    }, 'cache_size'), _getMaxAge(addon, LIST_TTL))
+
+
+def openCatalog(addon, profile, namespace):
+    if addon.getSetting('catalog_enabled') != 'true':
+        return None
+
+    from libs.catalog import MAX_AGE, SCHEMA_VERSION, Catalog
+    return Catalog(os.path.join(getStorePath(addon, profile), f'catalog-v{SCHEMA_VERSION}.db'), namespace,
+                   _getMaxAge(addon, MAX_AGE))
+
+
+def getSnapshotPath(addon, profile, namespace):
+    from libs.catalog_snapshot import VERSION
+
+    filename = re.sub(r'[^\w.-]', '_', namespace)
+    return os.path.join(getStorePath(addon, profile), f'catalog-{filename}-v{VERSION}.snapshot')
+
+
+def openCatalogSnapshot(addon, profile, namespace):
+    if addon.getSetting('catalog_enabled') != 'true':
+        return None
+
+    from libs.catalog_snapshot import openSnapshot
+    return openSnapshot(getSnapshotPath(addon, profile, namespace))
+
+
+def openStreamCache(addon, profile):
+    if addon.getSetting('cache_enabled') != 'true':
+        return None
+
+    from libs.stream_cache import SCHEMA_VERSION, StreamCache
+    return StreamCache(os.path.join(getStorePath(addon, profile), f'streams-v{SCHEMA_VERSION}.db'))
+
+
+def openImageCache(addon, profile):
+    if addon.getSetting('cache_enabled') != 'true':
+        return None
+
+    from libs.image_cache import ImageCache
+    return ImageCache(os.path.join(getStorePath(addon, profile), 'images'), _getSize(addon, {
+        '0': 25,
+        '1': 50,
+        '2': 100,
+        '3': 200
+    }, 'image_cache_size'))
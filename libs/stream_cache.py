@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import calendar
+import sqlite3
+import threading
+import time
+
+from libs.page_parser import getItemUrl
+from libs.records import dumps, loadItem
+
+DEFAULT_TTL = 24 * 60 * 60
+# part of the file name, the stored items are serialized Item records
+SCHEMA_VERSION = 1
+
+
+def getExpires(availableTo, now):
+    # a resolved item stays valid for as long as the ARD offers it
+    try:
+        return calendar.timegm(time.strptime(availableTo, '%Y-%m-%dT%H:%M:%SZ'))
+    except (TypeError, ValueError):
+        return now + DEFAULT_TTL
+
+
+class StreamCache:
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS items ('
+                                 'url TEXT PRIMARY KEY, '
+                                 'item TEXT NOT NULL, '
+                                 'expires REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS items_expires ON items (expires)')
+
+    def get(self, url, quality):
+        with self._lock:
+            row = self._connection.execute('SELECT item FROM items WHERE url = ? AND expires >= ?',
+                                           (url, time.time())).fetchone()
+
+        if row is None:
+            return None
+
+        # the whole quality map is stored, the stream is picked for the quality asked for now
+        item = loadItem(row[0])
+        return item._replace(url=getItemUrl(item.streams, quality))
+
+    def set(self, url, item):
+        now = time.time()
+        expires = getExpires(item.availableTo, now)
+        if expires <= now:
+            return
+
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO items (url, item, expires) VALUES (?, ?, ?)',
+                                     (url, dumps(item), expires))
+            self._connection.execute('DELETE FROM items WHERE expires < ?', (now,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from collections import namedtuple
+
+# short music clips of a concert are published as teasers of their own, their titles give them away
+CLIP_PATTERNS = ('Musik bei ',)
+
+
+def isClip(title):
+    return title is not None and any(pattern in title for pattern in CLIP_PATTERNS)
+
+
+def getTeaserFilter(addon):
+    return TeaserFilter(addon.getSetting('suppress_MusicClips') == 'true', {
+        '0': 0,
+        '1': 30,
+        '2': 60,
+        '3': 180,
+        '4': 300
+    }[addon.getSetting('suppress_duration')])
+
+
+class TeaserFilter(namedtuple('TeaserFilter', 'suppressClips minDuration')):
+    __slots__ = ()
+
+    def isValid(self, teaser):
+        if self.suppressClips and isClip(teaser.title):
+            return False
+
+        if self.minDuration > 0 and int(teaser.duration or 0) < self.minDuration:
+            return False
+
+        return True
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import threading
+import time
+
+
+_MAX_TRACEFILE_SIZE = 1024 * 1024
+_tracer = None
+
+
+def getTracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+
+    return _tracer
+
+
+def setTracer(tracer):
+    global _tracer
+    _tracer = tracer
+    return tracer
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    __slots__ = ('_tracer', '_name', '_start')
+
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._tracer._push()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self._tracer._pop(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Tracer:
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans = {}
+        self._start = time.perf_counter()
+
+    def span(self, name):
+        # disabled tracing hands out one shared no-op span, the instrumented code pays a method call
+        if not self.enabled:
+            return _NULL_SPAN
+
+        return _Span(self, name)
+
+    def add(self, name, elapsed):
+        # for time that is measured by the caller, e.g. a download interleaved with parsing
+        if self.enabled:
+            self._record(name, elapsed, elapsed)
+            stack = self._getStack()
+            if len(stack) > 0:
+                stack[-1] += elapsed
+
+    def _getStack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self):
+        self._getStack().append(0.0)
+
+    def _pop(self, name, elapsed):
+        # 'self' is the time of the span without the spans nested in it on the same thread
+        stack = self._getStack()
+        children = stack.pop()
+        if len(stack) > 0:
+            stack[-1] += elapsed
+        self._record(name, elapsed, elapsed - children)
+
+    def _record(self, name, elapsed, own):
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                self._spans[name] = [1, elapsed, own, elapsed]
+            else:
+                span[0] += 1
+                span[1] += elapsed
+                span[2] += own
+                span[3] = max(span[3], elapsed)
+
+    def getSummary(self):
+        with self._lock:
+            spans = {name: {
+                'count': span[0],
+                'total': round(span[1] * 1000, 3),
+                'self': round(span[2] * 1000, 3),
+                'max': round(span[3] * 1000, 3)
+            } for name, span in self._spans.items()}
+
+        return {
+            'wall': round((time.perf_counter() - self._start) * 1000, 3),
+            'spans': spans
+        }
+
+    def report(self, addon_id, route, path=None, cache=None, http=None):
+        # cache are the counters of the HTTP cache and http the totals of the transport, if the invocation opened them
+        import xbmc
+
+        summary = self.getSummary()
+        lines = [f'[{addon_id}] trace {route}: {summary["wall"]:.1f} ms']
+        for name, span in sorted(summary['spans'].items(), key=lambda item: -item[1]['self']):
+            lines.append(f'  {name}: {span["count"]}x, total {span["total"]:.1f} ms, self {span["self"]:.1f} ms, '
+                         f'max {span["max"]:.1f} ms')
+        if cache is not None:
+            summary['cache'] = cache
+            lines.append(f'  cache: {cache["hits"]} hits, {cache["misses"]} misses, {cache["coalesced"]} coalesced, '
+                         f'{cache["entries"]} entries, {cache["size"] / 1024:.0f} KiB')
+        if http is not None:
+            summary['http'] = http
+            lines.append(f'  http: {http["requests"]} requests, {http["errors"]} errors, '
+                         f'{http["bytes"] / 1024:.0f} KiB, total {http["latency"] * 1000:.1f} ms, '
+                         f'max {http["maxLatency"] * 1000:.1f} ms')
+        xbmc.log('\n'.join(lines), xbmc.LOGINFO)
+
+        if path is not None:
+            summary['time'] = time.time()
+            summary['route'] = route
+            try:
+                if os.path.exists(path) and os.path.getsize(path) > _MAX_TRACEFILE_SIZE:
+                    os.replace(path, path + '.1')
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(summary) + '\n')
+            except OSError as e:
+                xbmc.log(f'[{addon_id}] trace not written: {e}', xbmc.LOGWARNING)
@@ -15,6 +15,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import json
+import os
+
 DURATION = 'duration'
 BROADCASTEDON = 'broadcastedon'
 AVAILABLETO = 'availableto'
@@ -24,23 +27,76 @@ SECONDS = 'seconds'
 HOME = 'home'
 SEARCH = 'search'
 SEARCHHEADER = 'searchheader'
+ALLCONCERTS = 'allconcerts'
+STALE = 'stale'
+
+
+_IDS = {
+    DURATION:      30100,
+    BROADCASTEDON: 30101,
+    AVAILABLETO:   30102,
+    HOURS:         30103,
+    MINUTES:       30104,
+    SECONDS:       30105,
+    HOME:          30117,
+    SEARCH:        30118,
+    SEARCHHEADER:  30119,
+    ALLCONCERTS:   30135,
+    STALE:         30138
+}
+
+# one table per language and addon version, shared by every Translations of the process
+_tables = {}
+
+
+def _getTableKey(addon):
+    import xbmc
+
+    return f'{xbmc.getLanguage(xbmc.ISO_639_1, True)}-{addon.getAddonInfo("version")}'
+
+
+def _loadTable(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # a table written before strings were added is rebuilt
+    if not isinstance(table, dict) or table.keys() != _IDS.keys():
+        return None
+
+    return table
+
+
+def _saveTable(path, table):
+    temp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(table, f, ensure_ascii=False)
+        os.replace(temp, path)
+    except OSError:
+        pass
 
 
 class Translations:
 
-    def __init__(self, addon):
-        self._language = addon.getLocalizedString
+    def __init__(self, addon, directory=None):
+        key = _getTableKey(addon)
+        table = _tables.get(key)
+        if table is None:
+            path = os.path.join(directory, f'strings-{key}.json') if directory is not None else None
+            if path is not None:
+                table = _loadTable(path)
 
-    def getString(self, name):
+            if table is None:
+                table = {name: addon.getLocalizedString(stringId) for name, stringId in _IDS.items()}
+                if path is not None:
+                    _saveTable(path, table)
+
+            _tables[key] = table
 
-        return {
-            DURATION:          self._language(30100),
-            BROADCASTEDON:     self._language(30101),
-            AVAILABLETO:       self._language(30102),
-            HOURS:             self._language(30103),
-            MINUTES:           self._language(30104),
-            SECONDS:           self._language(30105),
-            HOME:              self._language(30117),
-            SEARCH:            self._language(30118),
-            SEARCHHEADER:      self._language(30119)
-        }[name]
+        self._strings = table
+
+    def getString(self, name):
+        return self._strings[name]
@@ -17,6 +17,27 @@
 
 import time
 from datetime import datetime
+from functools import lru_cache
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+@lru_cache(maxsize=4096)
+def _parseTimestamp(value):
+    # the fixed layout of the ARD timestamps, 2022-01-01T20:15:00Z, anything else goes through strptime
+    if len(value) == 20 and value[4] == '-' and value[7] == '-' and value[10] == 'T' and value[19] == 'Z':
+        try:
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+
+    return datetime(*(time.strptime(value, TIMESTAMP_FORMAT)[0:6]))
+
+
+@lru_cache(maxsize=4096)
+def _formatTimestamp(value, strFormat):
+    return _parseTimestamp(value).strftime(strFormat)
 
 
 class utils:
@@ -36,8 +57,17 @@ class utils:
     @staticmethod
     def getDateTime(strDateTime, strFormat):
         if strDateTime is not None:
+            if strFormat == TIMESTAMP_FORMAT:
+                return _parseTimestamp(strDateTime)
+
             return datetime(*(time.strptime(strDateTime, strFormat)[0:6]))
 
+    @staticmethod
+    def formatTimestamp(strDateTime, strFormat):
+        # memoized, the same broadcast and expiry times come up on every page
+        if strDateTime is not None:
+            return _formatTimestamp(strDateTime, strFormat)
+
     @staticmethod
     def formatDateTime(dateTime, strFormat):
         if dateTime is not None:
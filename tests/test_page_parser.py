@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Streaming PageParser with responses split into chunks at arbitrary offsets.
+#
+#   python -m pytest tests
+
+import json
+import os
+import sys
+import unittest
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from libs.page_parser import PageParser, _Reader  # noqa: E402
+
+_FIXTURE = os.path.join(_ROOT, 'benchmarks', 'fixtures', 'asset.json')
+
+
+def _getResponse():
+    # the head of the fixture, with top level numbers and text outside ASCII that a chunk boundary may cut
+    with open(_FIXTURE, 'rb') as f:
+        asset = json.load(f)
+
+    asset['teasers'] = asset['teasers'][:3]
+    asset['teasers'][0]['shortTitle'] = 'Rockpalast – Bühne'
+    asset['score'] = 12.25
+    asset['weight'] = 1.5e-3
+    asset['rank'] = -17
+    return json.dumps(asset, ensure_ascii=False, indent=1).encode('utf-8')
+
+
+class ReaderTest(unittest.TestCase):
+
+    def test_number_split_after_the_point(self):
+        self.assertEqual(_Reader([b'12.', b'5,']).readValue(), 12.5)
+
+    def test_number_split_in_the_exponent(self):
+        self.assertEqual(_Reader([b'1e', b'-3 ']).readValue(), 0.001)
+        self.assertEqual(_Reader([b'15', b'e2}']).readValue(), 1500.0)
+
+
+class PageParserTest(unittest.TestCase):
+
+    def test_split_at_every_offset(self):
+        response = _getResponse()
+        parser = PageParser([response])
+        teasers = parser.parse()
+        self.assertEqual(len(teasers), 3)
+
+        for offset in range(1, len(response)):
+            parser = PageParser([response[:offset], response[offset:]])
+            self.assertEqual(parser.parse(), teasers, f'split at {offset}')
+            self.assertEqual(parser.pagination.totalElements, 120)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# PrefetchScheduler and the request budget of PrefetchService, with the benchmarks/fake_kodi modules, a fake
+# clock and the FixtureServer.
+#
+#   python -m pytest tests
+
+import os
+import sys
+import tempfile
+import unittest
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from benchmarks import fake_kodi  # noqa: E402
+
+fake_kodi.install()
+
+import xbmcaddon  # noqa: E402
+
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+from libs.http_cache import LIST_TTL  # noqa: E402
+from libs.kodion.addon import Addon  # noqa: E402
+from libs.prefetch_service import PrefetchScheduler, PrefetchService, _BudgetExhausted, _BudgetTransport  # noqa: E402
+from libs.stores import openCache  # noqa: E402
+
+
+class FakeClock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakePlayer:
+
+    def __init__(self, playing=False):
+        self.playing = playing
+
+    def isPlaying(self):
+        return self.playing
+
+
+class FakeMonitor:
+
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        return False
+
+
+class CountingTransport:
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url):
+        self.requests += 1
+
+    def iterContent(self, url):
+        self.requests += 1
+        return iter(())
+
+
+class PrefetchSchedulerTest(unittest.TestCase):
+
+    def test_run_comes_due(self):
+        clock = FakeClock()
+        scheduler = PrefetchScheduler(3600, startDelay=60, clock=clock)
+        self.assertFalse(scheduler.isDue())
+
+        clock.now += 60
+        self.assertTrue(scheduler.isDue())
+
+        scheduler.markDone()
+        clock.now += 3599
+        self.assertFalse(scheduler.isDue())
+        clock.now += 1
+        self.assertTrue(scheduler.isDue())
+
+    def test_interrupted_run_is_retried(self):
+        clock = FakeClock()
+        scheduler = PrefetchScheduler(3600, startDelay=0, retryDelay=60, clock=clock)
+        scheduler.markInterrupted()
+
+        clock.now += 59
+        self.assertFalse(scheduler.isDue())
+        clock.now += 1
+        self.assertTrue(scheduler.isDue())
+
+
+class BudgetTransportTest(unittest.TestCase):
+
+    def test_budget_stops_requests(self):
+        inner = CountingTransport()
+        transport = _BudgetTransport(inner, 2, lambda: False)
+        transport.get('http://localhost/1')
+        transport.iterContent('http://localhost/2')
+
+        with self.assertRaises(_BudgetExhausted):
+            transport.get('http://localhost/3')
+        self.assertEqual(inner.requests, 2)
+
+
+class PrefetchServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self._profile = tempfile.TemporaryDirectory()
+        xbmcaddon.profile = self._profile.name
+        xbmcaddon.settings.clear()
+        xbmcaddon.settings.update({
+            'prefetch_enabled': 'true',
+            'prefetch_interval': '1',
+            'prefetch_budget': '0',
+            'prefetch_pages': '3'
+        })
+
+        self.server = FixtureServer().start()
+        self.clock = FakeClock()
+        self.player = FakePlayer()
+        self.service = PrefetchService('plugin.video.rockpalast', 'Y3JpZDovL3dkci5kZS9Sb2NrcGFsYXN0', 'wdr',
+                                       FakeMonitor(), self.player, self.clock)
+        self.service._BASEURL = self.service._BASEURL.replace('https://api.ardmediathek.de', self.server.host)
+        self.server.reset()
+
+    def tearDown(self):
+        self.server.stop()
+        xbmcaddon.settings.clear()
+        self._profile.cleanup()
+
+    def test_playback_reschedules_the_run(self):
+        self.player.playing = True
+        self.clock.now += 60
+        self.service.runOnce()
+
+        self.assertEqual(self.server.requests, 0)
+        self.clock.now += 59
+        self.assertFalse(self.service._scheduler.isDue())
+        self.clock.now += 1
+        self.assertTrue(self.service._scheduler.isDue())
+
+    def test_budget_stops_the_refresh(self):
+        # budget '0' allows 25 requests, the catalog sync, the item pages and the posters need far more
+        self.clock.now += 60
+        self.service.runOnce()
+
+        self.assertEqual(self.server.requests, 25)
+        # a refresh cut short by the budget counts as done, the next one follows the interval
+        self.clock.now += 60 * 60 - 1
+        self.assertFalse(self.service._scheduler.isDue())
+        self.clock.now += 1
+        self.assertTrue(self.service._scheduler.isDue())
+
+    def test_refresh_outlives_the_interval(self):
+        xbmcaddon.settings.update({
+            'cache_enabled': 'true',
+            'cache_size': '1',
+            'prefetch_budget': '3',
+            'prefetch_pages': '0'
+        })
+        cache = openCache(Addon('plugin.video.rockpalast'), self._profile.name)
+        self.assertEqual(cache._listTTL, 75 * 60)
+        cache.close()
+
+        self.clock.now += 60
+        self.service.runOnce()
+        self.assertGreater(self.server.requests, 1)
+
+        # the lists are still cached, the next refresh downloads them again all the same
+        self.server.reset()
+        self.clock.now += 60 * 60
+        self.service.runOnce()
+        self.assertEqual(self.server.requests, 1)
+
+        xbmcaddon.settings['prefetch_enabled'] = 'false'
+        cache = openCache(Addon('plugin.video.rockpalast'), self._profile.name)
+        self.assertEqual(cache._listTTL, LIST_TTL)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# Copyright 2022 WebEye
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# AIMD, Retry-After and deadline handling of RequestScheduler and HttpTransport.
+#
+#   python -m pytest tests
+
+import os
+import sys
+import time
+import unittest
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from libs.http_transport import DeadlineTransport, HttpTransport  # noqa: E402
+from libs.request_scheduler import MAX_PAUSE, HostPaused, RequestScheduler  # noqa: E402
+
+
+class FakeResponse:
+
+    def __init__(self, status, retryAfter=None):
+        self.status_code = status
+        self.headers = {} if retryAfter is None else {'Retry-After': str(retryAfter)}
+        self.content = b''
+
+    def close(self):
+        pass
+
+
+class RequestSchedulerTest(unittest.TestCase):
+
+    def test_healthy_responses_grow_the_limit(self):
+        scheduler = RequestScheduler(concurrency=2, maxConcurrency=3)
+        for _ in range(10):
+            scheduler.acquire()
+            scheduler.release(200, 0.05)
+
+        self.assertEqual(scheduler.limit, 3)
+
+    def test_throttling_halves_the_limit_once_per_round_trip(self):
+        scheduler = RequestScheduler(concurrency=8)
+        scheduler.acquire()
+        scheduler.release(200, 0.05)
+        limit = scheduler.limit
+
+        for _ in range(3):
+            scheduler.acquire()
+            scheduler.release(503, 0.05)
+
+        self.assertEqual(scheduler.limit, limit / 2)
+
+        # one round trip later the next throttled response halves it again
+        time.sleep(0.06)
+        scheduler.acquire()
+        scheduler.release(None, 0.05)
+        self.assertEqual(scheduler.limit, limit / 4)
+
+    def test_latency_spike_halves_the_limit(self):
+        scheduler = RequestScheduler(concurrency=4, maxConcurrency=4)
+        scheduler.acquire()
+        scheduler.release(200, 0.1)
+        scheduler.acquire()
+        scheduler.release(200, 1.0)
+
+        self.assertEqual(scheduler.limit, 2)
+
+    def test_limit_never_drops_below_minimum(self):
+        scheduler = RequestScheduler(concurrency=2, minConcurrency=1)
+        for _ in range(5):
+            scheduler.acquire()
+            scheduler.release(429, 0.05)
+            time.sleep(0.06)
+
+        self.assertEqual(scheduler.limit, 1)
+
+    def test_retry_after_pauses_the_host(self):
+        scheduler = RequestScheduler()
+        scheduler.acquire()
+        scheduler.release(429, 0.05, retryAfter=0.3)
+
+        start = time.monotonic()
+        scheduler.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_retry_after_beyond_the_limit_does_not_pause(self):
+        scheduler = RequestScheduler()
+        scheduler.acquire()
+        scheduler.release(429, 0.05, retryAfter=3600)
+
+        start = time.monotonic()
+        scheduler.acquire(maxWait=2)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_pause_past_the_deadline_fails_fast(self):
+        scheduler = RequestScheduler()
+        scheduler.acquire()
+        scheduler.release(429, 0.05, retryAfter=MAX_PAUSE)
+
+        start = time.monotonic()
+        with self.assertRaises(HostPaused):
+            scheduler.acquire(maxWait=1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+class HttpTransportRetryAfterTest(unittest.TestCase):
+
+    def _getTransport(self, responses):
+        transport = HttpTransport(retries=1, backoff=0)
+        calls = []
+
+        def get(url, timeout=None, stream=False):
+            calls.append(time.monotonic())
+            return responses[len(calls) - 1]
+
+        transport._session.get = get
+        return transport, calls
+
+    def test_short_retry_after_is_waited_out(self):
+        transport, calls = self._getTransport([FakeResponse(429, 1), FakeResponse(200)])
+        self.assertEqual(transport.get('http://localhost/page').status_code, 200)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.95)
+
+    def test_long_retry_after_is_not_retried_and_does_not_pause(self):
+        transport, calls = self._getTransport([FakeResponse(429, 3600), FakeResponse(200), FakeResponse(200)])
+        self.assertEqual(transport.get('http://localhost/page').status_code, 429)
+        self.assertEqual(len(calls), 1)
+
+        start = time.monotonic()
+        self.assertEqual(transport.get('http://localhost/other').status_code, 200)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+class HttpTransportDeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = HttpTransport(retries=2, backoff=0)
+        self.timeouts = []
+
+        def get(url, timeout=None, stream=False):
+            self.timeouts.append(timeout)
+            return FakeResponse(200)
+
+        self.transport._session.get = get
+
+    def test_deadline_caps_the_timeouts(self):
+        transport = DeadlineTransport(self.transport, time.monotonic() + 2)
+        self.assertEqual(transport.get('http://localhost/page').status_code, 200)
+        self.assertLessEqual(max(self.timeouts[0]), 2)
+
+    def test_no_request_after_the_deadline(self):
+        import requests
+
+        transport = DeadlineTransport(self.transport, time.monotonic() - 1)
+        with self.assertRaises(requests.Timeout):
+            transport.get('http://localhost/page')
+        self.assertEqual(self.timeouts, [])
+
+
+if __name__ == '__main__':
+    unittest.main()